@@ -0,0 +1,114 @@
+import asyncio
+import itertools
+import time
+
+from .exceptions import AdmissionRejectedException
+from .pqueue import PriorityQueue
+
+REJECT = 'reject'
+DROP_LOWEST = 'drop_lowest'
+DROP_OLDEST = 'drop_oldest'
+
+
+class _Waiter:
+    __slots__ = ('future', 'priority', 'seq', 'enqueued')
+
+    def __init__(self, future: asyncio.Future, priority: int, seq: int):
+        self.future = future
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = time.monotonic()
+
+
+class AdmissionControl:
+    """Bounds events forwarded at once, queueing the excess by event priority
+
+    Once the queue is full, the policy either rejects the incoming event, drops
+    the queued event of lowest priority, or drops the oldest queued event.
+    Events rejected or dropped fail with AdmissionRejectedException.
+    """
+    _next: "PriorityQueue[_Waiter, int]"
+    _victims: "PriorityQueue[_Waiter, int]"
+
+    def __init__(self, max_inflight: int = 100, max_queue: int = 1000, policy: str = REJECT):
+        if max_inflight <= 0 or max_queue < 0:
+            raise ValueError('In-flight limit must be positive and queue size non-negative!')
+        if policy not in (REJECT, DROP_LOWEST, DROP_OLDEST):
+            raise ValueError(f'Unknown admission policy {policy}!')
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.policy = policy
+        self.inflight = 0
+        # Admitted highest priority first, then first come first served
+        self._next = PriorityQueue(lambda w: -w.priority)
+        # Dropped first under the policy
+        self._victims = PriorityQueue((lambda w: w.priority) if policy == DROP_LOWEST else (lambda w: w.seq))
+        self._counter = itertools.count()
+        self.admitted = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.wait_time = 0.
+        self.max_wait_time = 0.
+
+    async def acquire(self, priority: int = 0) -> None:
+        """Wait for the event to be admitted
+
+        :raise AdmissionRejectedException: The event was rejected or dropped from the queue
+        """
+        if self.inflight < self.max_inflight and not self._next:
+            self.inflight += 1
+            self.admitted += 1
+            return
+
+        waiter = self._enqueue(priority)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._next:
+                self._remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                # Admitted meanwhile
+                self.release()
+            raise
+
+        waited = time.monotonic() - waiter.enqueued
+        self.wait_time += 0.2 * (waited - self.wait_time)
+        self.max_wait_time = max(self.max_wait_time, waited)
+
+    def _enqueue(self, priority: int) -> _Waiter:
+        if len(self._next) >= self.max_queue:
+            victim = self._victims.top() if self.policy != REJECT else None
+            if victim is None or (self.policy == DROP_LOWEST and victim.priority >= priority):
+                self.rejected += 1
+                raise AdmissionRejectedException('Event rejected, admission queue is full')
+            self._remove(victim)
+            self.dropped += 1
+            victim.future.set_exception(AdmissionRejectedException('Event dropped from admission queue'))
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), priority, next(self._counter))
+        self._next.push(waiter)
+        self._victims.push(waiter)
+        return waiter
+
+    def _remove(self, waiter: _Waiter) -> None:
+        self._next.remove(waiter)
+        self._victims.remove(waiter)
+
+    def release(self) -> None:
+        self.inflight -= 1
+        while self._next and self.inflight < self.max_inflight:
+            waiter = self._next.pop()
+            self._victims.remove(waiter)
+            self.inflight += 1
+            self.admitted += 1
+            waiter.future.set_result(None)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._next)
+
+    @property
+    def stats(self) -> dict:
+        return {'inflight': self.inflight, 'queue_depth': len(self._next),
+                'admitted': self.admitted, 'rejected': self.rejected, 'dropped': self.dropped,
+                'wait_time': self.wait_time, 'max_wait_time': self.max_wait_time}
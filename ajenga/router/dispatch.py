@@ -0,0 +1,158 @@
+import asyncio
+
+from ajenga.typing import (TYPE_CHECKING, Any, Awaitable, Callable, List,
+                           Optional, Tuple, Union)
+
+from .utils import aclosing, run_async
+
+if TYPE_CHECKING:
+    from .engine import Engine
+
+Sink_T = Callable[[Tuple, Any], Union[Awaitable, Any]]
+
+
+class Dispatcher:
+    """Queue of submitted events forwarded by a pool of dispatcher coroutines
+
+    Results of each event are passed to the sinks as they come, and the future
+    returned on submit resolves to all of them. A failing sink is reported to
+    the loop's exception handler, and does not keep results from other sinks.
+
+    Up to batch_size queued events without keyword arguments are routed together
+    with forward_many, as long as the engine routes batches like single events.
+    """
+    _queue: "Optional[asyncio.Queue[Tuple[Tuple, dict, asyncio.Future]]]"
+
+    def __init__(self, workers: int = 10, maxsize: int = 0, batch_size: int = 1):
+        """
+        :param workers: Number of dispatcher coroutines
+        :param maxsize: Max events queued, submit waits beyond it, 0 for unbounded
+        :param batch_size: Max events routed together
+        """
+        if workers <= 0 or batch_size <= 0:
+            raise ValueError('Number of workers and batch size must be positive!')
+        self.workers = workers
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.sinks: List[Sink_T] = []
+        self.closed = False
+        self._queue = None
+        self._workers: List[asyncio.Task] = []
+
+    def add_sink(self, sink: Sink_T) -> Sink_T:
+        """Register a function called with (event args, result) for each result"""
+        self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self, sink: Sink_T) -> None:
+        self.sinks.remove(sink)
+
+    async def submit(self, engine: "Engine", args: Tuple, kwargs: dict) -> asyncio.Future:
+        if self.closed:
+            raise RuntimeError('Cannot submit to a closed dispatcher!')
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.maxsize)
+            self._workers = [asyncio.ensure_future(self._work(engine)) for _ in range(self.workers)]
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((args, kwargs, future))
+        return future
+
+    async def _work(self, engine: "Engine"):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            # Events with keyword arguments are forwarded on their own,
+            # like all events when batches would bypass features of the engine
+            if engine.batchable:
+                plain = [item for item in batch if not item[1]]
+                jobs = [self._forward(engine, *item) for item in batch if item[1]]
+            else:
+                plain, jobs = [], [self._forward(engine, *item) for item in batch]
+            if len(plain) == 1:
+                jobs.append(self._forward(engine, *plain[0]))
+            elif plain:
+                jobs.append(self._forward_many(engine, plain))
+            try:
+                await asyncio.gather(*jobs)
+            except asyncio.CancelledError:
+                # Jobs cancelled before they started leave their futures pending
+                for _, _, future in batch:
+                    future.cancel()
+                raise
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _forward(self, engine: "Engine", args: Tuple, kwargs: dict, future: asyncio.Future):
+        results = []
+        try:
+            async with aclosing(engine.forward(*args, **kwargs)) as stream:
+                async for res in stream:
+                    results.append(res)
+                    await self._emit(args, res)
+        except asyncio.CancelledError:
+            # Dispatcher closed without draining
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(results)
+
+    async def _forward_many(self, engine: "Engine", batch: List[Tuple[Tuple, dict, asyncio.Future]]):
+        results = [[] for _ in batch]
+        try:
+            async with aclosing(engine.forward_many([args for args, _, _ in batch])) as stream:
+                async for index, res in stream:
+                    results[index].append(res)
+                    await self._emit(batch[index][0], res)
+        except asyncio.CancelledError:
+            for _, _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), res in zip(batch, results):
+            if not future.done():
+                future.set_result(res)
+
+    async def _emit(self, args: Tuple, res: Any):
+        for sink in self.sinks:
+            try:
+                await run_async(sink, args, res)
+            except Exception as e:
+                asyncio.get_running_loop().call_exception_handler({
+                    'message': f'Sink {sink} failed on a result of {args}',
+                    'exception': e,
+                })
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def close(self, drain: bool = True) -> None:
+        """Stop accepting events and stop the dispatcher coroutines
+
+        :param drain: Forward events already queued first, else cancel them
+        """
+        self.closed = True
+        if self._queue is None:
+            return
+        if drain:
+            await self._queue.join()
+        else:
+            while not self._queue.empty():
+                _, _, future = self._queue.get_nowait()
+                future.cancel()
+                self._queue.task_done()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
@@ -1,13 +1,29 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from functools import partial
 from typing import Optional, Tuple
 
-from ajenga.typing import AsyncIterable, Callable, Iterable, Set, Type, final
+from ajenga.typing import (Any, AsyncIterable, Callable, Dict, Iterable, List,
+                           Set, Type, Union, final)
 
-from .exceptions import RouteException
+from .admission import AdmissionControl
+from .dispatch import Dispatcher, Sink_T
+from .exceptions import RouteException, RouteInternalException
+from .keycache import KeyCache
+from .keyfunc import KeyFunction
 from .keystore import KeyStore
-from .models import Executor, Graph, Priority, TerminalNode
-from .models.execution import PriorityExecutor
-from .state import RouteResult, RouteState
+from .loopthread import LoopThread
+from .models import Executor, Graph, Priority, Task, TerminalNode
+from .models.execution import PriorityExecutor, Scheduler, TaskDroppedError
+from .offload import WorkerPools
+from .routecache import RouteCache
+from .session import SessionRegistry
+from .singleflight import SingleFlight
+from .state import RouteResult, RouteState, RouteTracker
 from .std import HandlerNode
+from .utils import aclosing, consume_async_iterator
 
 
 class Engine:
@@ -22,11 +38,43 @@ class Engine:
     def __init__(self, *,
                  handler_cls: Type[TerminalNode] = HandlerNode,
                  executor_factory: Callable[..., Executor] = PriorityExecutor,
+                 key_cache: Optional[KeyCache] = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 route_cache: Optional[RouteCache] = None,
+                 prefetch: Union[bool, Iterable[KeyFunction]] = False,
+                 route_timeout: Optional[float] = None,
+                 pipeline: bool = False,
+                 scheduler: Optional[Scheduler] = None,
+                 pools: Optional[WorkerPools] = None,
+                 sessions: Optional[SessionRegistry] = None,
+                 admission: Optional[AdmissionControl] = None,
+                 dispatcher: Optional[Dispatcher] = None,
+                 threaded: bool = False,
                  ):
+        """
+        :param threaded: Run the engine on a dedicated loop thread, to be fed
+                         with forward_threadsafe and submit_threadsafe
+        """
         self._graph = Graph().apply()
         self._dirty = True
+        # Handlers may be registered from other threads than the one of the loop
+        self._graph_lock = threading.RLock()
         self._handler_cls = handler_cls
         self._executor_factory = executor_factory
+        self._key_cache = key_cache
+        self._single_flight = single_flight
+        self._route_cache = route_cache
+        self._prefetch = prefetch if isinstance(prefetch, bool) else frozenset(prefetch)
+        self._prefetch_keys: Set[KeyFunction] = set()
+        self._route_timeout = route_timeout
+        self._pipeline = pipeline
+        self._priorities: Dict[int, int] = {}
+        self._scheduler = scheduler
+        self._pools = pools or WorkerPools()
+        self._sessions = sessions
+        self._admission = admission
+        self._dispatcher = dispatcher or Dispatcher()
+        self._loop_thread = LoopThread().start() if threaded else None
 
     @property
     def graph(self) -> Graph:
@@ -36,30 +84,159 @@ class Engine:
     def handler_cls(self) -> Type[TerminalNode]:
         return self._handler_cls
 
+    @property
+    def key_cache(self) -> Optional[KeyCache]:
+        return self._key_cache
+
+    @property
+    def single_flight(self) -> Optional[SingleFlight]:
+        return self._single_flight
+
+    @property
+    def route_cache(self) -> Optional[RouteCache]:
+        return self._route_cache
+
+    @property
+    def scheduler(self) -> Optional[Scheduler]:
+        return self._scheduler
+
+    @property
+    def pools(self) -> WorkerPools:
+        return self._pools
+
+    @property
+    def sessions(self) -> Optional[SessionRegistry]:
+        return self._sessions
+
+    @property
+    def admission(self) -> Optional[AdmissionControl]:
+        return self._admission
+
+    @property
+    def dispatcher(self) -> Dispatcher:
+        return self._dispatcher
+
+    @property
+    def loop_thread(self) -> Optional[LoopThread]:
+        return self._loop_thread
+
+    @property
+    def batchable(self) -> bool:
+        """Whether forward_many routes events as forward does, none of the features it bypasses being on"""
+        return self._admission is None and self._route_cache is None and not self._prefetch \
+            and not self._pipeline and (self._sessions is None or self._sessions.key_function is None)
+
     def on(self, graph: Graph) -> Graph:
         return GraphImpl(engine=self) & graph
 
     def subscribe(self, graph: Graph) -> None:
         # TODO: Subscribe does not copy the graph, thus returned frozen graph can change!
         if graph.closed:
-            self._graph |= graph
-            self._dirty = True
+            with self._graph_lock:
+                self._graph |= graph
+                self._dirty = True
         else:
             raise ValueError("Cannot subscribe an open graph!")
 
     def unsubscribe_terminals(self, terminals: Iterable[TerminalNode]):
-        self._graph.remove_terminals(terminals)
-        self._dirty = True
+        with self._graph_lock:
+            self._graph.remove_terminals(terminals)
+            self._dirty = True
 
-    async def forward(self, *args, **kwargs) -> AsyncIterable:
+    def _snapshot(self) -> Graph:
         if self._dirty:
-            self._graph_impl = self._graph.copy()
-            self._dirty = False
+            with self._graph_lock:
+                if self._dirty:
+                    self._graph_impl = self._graph.copy()
+                    self._dirty = False
+                    if self._route_cache is not None:
+                        self._route_cache.clear()
+                    if self._prefetch is True:
+                        self._prefetch_keys = self._graph_impl.required_key_functions()
+                    elif self._prefetch:
+                        self._prefetch_keys = self._prefetch
+                    if self._pipeline:
+                        self._priorities = self._graph_impl.terminal_priorities(Priority.Default)
+        return self._graph_impl
 
-        state = RouteState(args, KeyStore(kwargs))
+    def _make_state(self, args: Tuple, kwargs: dict, route_timeout: Optional[float] = None) -> RouteState:
+        route_timeout = route_timeout if route_timeout is not None else self._route_timeout
+        deadline = time.monotonic() + route_timeout if route_timeout is not None else None
+        state = RouteState(args, KeyStore(kwargs,
+                                          cache=self._key_cache,
+                                          flights=self._single_flight,
+                                          deadline=deadline))
         state.store['_store'] = state.store
         state.store['_state'] = state
-        routed = await self._graph_impl.route(state)
+        state.store['_pools'] = self._pools
+        return state
+
+    async def forward(self, *args,
+                      _route_timeout: Optional[float] = None,
+                      _start_timeout: Optional[float] = None,
+                      _limit: Optional[int] = None,
+                      _priority: int = Priority.Default,
+                      **kwargs) -> AsyncIterable:
+        """Route an event and run matched terminals
+
+        Under admission control the event holds its slot until the iterator is
+        exhausted or closed, so consumers stopping early should close it at once,
+        e.g. with contextlib.aclosing, rather than leave it to garbage collection.
+
+        :param _route_timeout: Seconds allowed for routing, branches consulting
+                               key functions past it fail with RouteTimeoutException
+        :param _start_timeout: Seconds allowed for handlers to start, those still waiting
+                               past it are dropped and yield DeadlineExceededError.
+                               Expired handlers are only dropped once next to start,
+                               and hold their arguments until then
+        :param _limit: Stop after this many results other than exceptions, cancelling
+                       running handlers and never starting the queued ones
+        :param _priority: Priority of the event for admission control
+        :raise AdmissionRejectedException: The event was not admitted under overload
+        :return: AsyncIterator of results
+        """
+        if _limit is not None and _limit < 1:
+            raise ValueError('Limit of results must be positive!')
+        deadline = time.monotonic() + _start_timeout if _start_timeout is not None else None
+        if self._admission is None:
+            async with aclosing(self._forward(args, kwargs, _route_timeout, deadline, _limit)) as results:
+                async for res in results:
+                    yield res
+            return
+
+        await self._admission.acquire(_priority)
+        try:
+            async with aclosing(self._forward(args, kwargs, _route_timeout, deadline, _limit)) as results:
+                async for res in results:
+                    yield res
+        finally:
+            self._admission.release()
+
+    async def _forward(self,
+                       args: Tuple,
+                       kwargs: dict,
+                       route_timeout: Optional[float],
+                       deadline: Optional[float],
+                       limit: Optional[int],
+                       ) -> AsyncIterable:
+        if self._sessions is not None:
+            self._sessions.expire()
+        state = self._make_state(args, kwargs, route_timeout)
+        state.deadline = deadline
+        graph = self._snapshot()
+        try:
+            woken = await self._wake_session(state, kwargs)
+        except RouteException as e:
+            # Yielded like other key function failures, the event then has no session
+            woken = []
+            yield e.args[0]
+        if self._pipeline:
+            async with aclosing(self._forward_pipelined(graph, state, woken, limit)) as results:
+                async for res in results:
+                    yield res
+            return
+
+        routed = await self._route(graph, state)
         terminals: Iterable[RouteResult] = []
         exceptions: Iterable[RouteException] = []
         for routed_result in routed:
@@ -71,23 +248,243 @@ class Engine:
         for e in exceptions:
             yield e.args[0]
 
-        executor = self._executor_factory()
+        executor = self._new_executor()
+        executor.add_tasks([self._make_task(state, r) for r in terminals] + woken)
+
+        async with aclosing(self._run(executor, limit)) as results:
+            async for res in results:
+                yield res
+
+    @staticmethod
+    async def _run(executor: Executor, limit: Optional[int]) -> AsyncIterable:
+        async with aclosing(executor.run()) as results:
+            async for res in results:
+                if limit is not None and not isinstance(res, Exception):
+                    limit -= 1
+                    if not limit:
+                        executor.stop()
+                        yield res
+                        return
+                yield res
+
+    async def _wake_session(self, state: RouteState, kwargs: dict) -> List[Task]:
+        """Claim the paused task of the event's session, to be resumed with the event
 
-        for r in terminals:
-            terminal = r.node
-            mapping = r.mapping
-            executor.create_task(terminal.forward,
-                                 priority=getattr(terminal, 'priority', Priority.Default),
-                                 count_finished=getattr(terminal, 'count_finished', True),
-                                 args=(state, mapping,),
-                                 )
-    
-        async for res in executor.run():
-            yield res
+        The task is scheduled at wakeup priority, its own is restored once it resumes.
+
+        :raise RouteException: The session key function failed
+        """
+        if self._sessions is None or self._sessions.key_function is None:
+            return []
+        try:
+            session_key = await state.store(self._sessions.key_function, state)
+        except RouteException:
+            raise
+        except Exception as e:
+            raise RouteInternalException(e)
+        task = self._sessions.take(session_key) if session_key is not None else None
+        if task is None:
+            return []
+        task.args, task.kwargs = state.args, kwargs
+        task.priority = Priority.Wakeup
+        task.deadline = state.deadline
+        return [task]
+
+    async def _forward_pipelined(self,
+                                 graph: Graph,
+                                 state: RouteState,
+                                 woken: List[Task],
+                                 limit: Optional[int] = None,
+                                 ) -> AsyncIterable:
+        """Hand terminals to the executor as soon as routing finds them
+
+        Tasks are held back while routing may still find terminals of higher
+        priority. Route exceptions are yielded once routing has finished.
+        """
+        executor = self._new_executor()
+        state.tracker = RouteTracker(self._priorities,
+                                     lambda r: executor.add_task(self._make_task(state, r)),
+                                     executor.hold,
+                                     root=graph.start)
+        state.tracker.enter((graph.start,))
+        executor.add_tasks(woken)
+
+        async def route():
+            try:
+                routed = await self._route(graph, state)
+                # Results not found along the way, e.g. from the route cache
+                for routed_result in routed:
+                    if isinstance(routed_result, RouteResult):
+                        state.tracker.found(routed_result)
+                return routed
+            finally:
+                executor.close()
+
+        routing = asyncio.ensure_future(route())
+        try:
+            async with aclosing(self._run(executor, limit)) as results:
+                async for res in results:
+                    yield res
+            if executor.stopped:
+                return
+            for routed_result in await routing:
+                if isinstance(routed_result, RouteException):
+                    yield routed_result.args[0]
+        finally:
+            if not routing.done():
+                routing.cancel()
+
+    def _new_executor(self) -> Executor:
+        if self._scheduler is not None:
+            return self._executor_factory(scheduler=self._scheduler)
+        return self._executor_factory()
+
+    async def _route(self, graph: Graph, state: RouteState):
+        if self._prefetch_keys:
+            state.store.prefetch(self._prefetch_keys, state)
+        try:
+            if self._route_cache is not None:
+                return await self._route_cache.route(graph, state)
+            return await graph.route(state)
+        finally:
+            state.store.discard_prefetched()
+
+    def _make_task(self, state: RouteState, r: RouteResult, fn: Optional[Callable] = None) -> Task:
+        terminal = r.node
+        deadline = state.deadline
+        handler_deadline = getattr(terminal, 'deadline', None)
+        if handler_deadline is not None:
+            handler_deadline += time.monotonic()
+            deadline = handler_deadline if deadline is None else min(deadline, handler_deadline)
+        return Task(fn or terminal.forward,
+                    priority=getattr(terminal, 'priority', Priority.Default),
+                    deadline=deadline,
+                    sessions=self._sessions,
+                    throttle=getattr(terminal, 'throttle', None),
+                    count_finished=getattr(terminal, 'count_finished', True),
+                    args=(state, r.mapping,),
+                    )
+
+    async def forward_many(self, events: Iterable[Tuple], *,
+                           _route_timeout: Optional[float] = None,
+                           _start_timeout: Optional[float] = None,
+                           **kwargs) -> AsyncIterable[Tuple[int, Any]]:
+        """Route a batch of events through the graph together
+
+        Each node is visited once with the events reaching it, and all matched
+        terminals are run under one executor.
+
+        Unlike forward, the batch bypasses admission control, the route cache,
+        prefetching and pipelining, does not wake paused sessions, and cannot be
+        limited or prioritized. Use forward for events relying on those.
+
+        :param events: Positional arguments of each event, as passed to forward
+        :param _route_timeout: Seconds allowed for routing each event, as in forward
+        :param _start_timeout: Seconds allowed for handlers to start, as in forward
+        :param kwargs: Keyword arguments shared by every event
+        :return: AsyncIterator of (index of event, result)
+        """
+        states = [self._make_state(tuple(args), kwargs, _route_timeout) for args in events]
+        if _start_timeout is not None:
+            deadline = time.monotonic() + _start_timeout
+            for state in states:
+                state.deadline = deadline
+        routed = await self._snapshot().route_many(states)
+        terminals: List[Tuple[int, RouteState, RouteResult]] = []
+        for index, (state, routed_results) in enumerate(zip(states, routed)):
+            for routed_result in routed_results:
+                if isinstance(routed_result, RouteResult):
+                    terminals.append((index, state, routed_result))
+                elif isinstance(routed_result, RouteException):
+                    yield index, routed_result.args[0]
+
+        indices: Dict[Task, int] = {}
+        for index, state, r in terminals:
+            indices[self._make_task(state, r, _indexed(index, r.node.forward))] = index
+        executor = self._new_executor()
+        executor.add_tasks(list(indices))
+
+        async with aclosing(executor.run()) as results:
+            async for res in results:
+                if isinstance(res, TaskDroppedError):
+                    # Dropped by the executor without running the indexed wrapper
+                    yield indices[res.task], res
+                else:
+                    yield res
+
+    async def submit(self, *args, **kwargs) -> asyncio.Future:
+        """Queue an event to be forwarded by the engine's dispatchers
+
+        Waits only while the queue is full.
+
+        :return: Future of the list of results
+        """
+        return await self._dispatcher.submit(self, args, kwargs)
+
+    def forward_threadsafe(self, *args, **kwargs) -> concurrent.futures.Future:
+        """Forward an event from any thread on the engine's loop thread
+
+        :return: Future of the list of results
+        """
+        return self._threadsafe(lambda: consume_async_iterator(self.forward(*args, **kwargs)))
+
+    def submit_threadsafe(self, *args, **kwargs) -> concurrent.futures.Future:
+        """Submit an event from any thread to the dispatchers on the engine's loop thread
+
+        :return: Future of the list of results
+        """
+        async def submit():
+            return await (await self.submit(*args, **kwargs))
+
+        return self._threadsafe(submit)
+
+    def _threadsafe(self, fn: Callable) -> concurrent.futures.Future:
+        if self._loop_thread is None:
+            raise RuntimeError('Engine is not running on a loop thread!')
+        return self._loop_thread.call(fn)
+
+    def add_sink(self, sink: Sink_T) -> Sink_T:
+        """Register a function called with (event args, result) for results of submitted events"""
+        return self._dispatcher.add_sink(sink)
 
     def clear(self):
-        self._graph.clear()
-        self._graph_impl = self._graph.copy()
+        with self._graph_lock:
+            self._graph.clear()
+            self._dirty = True
+
+    async def aclose(self, drain: bool = True):
+        """Stop dispatching submitted events, then shut down
+
+        :param drain: Forward events already submitted first, else cancel them
+        """
+        await self._dispatcher.close(drain=drain)
+        if self._sessions is not None:
+            self._sessions.clear()
+        # Waiting for offloaded handlers must not block the loop
+        await asyncio.get_running_loop().run_in_executor(None, self._pools.shutdown)
+
+    def shutdown(self, wait: bool = True):
+        """Shut down worker pools of offloaded handlers and cancel paused tasks
+
+        On a loop thread, also stops dispatching and the thread, draining if wait
+        """
+        if self._loop_thread is not None and not self._loop_thread.is_current():
+            self._loop_thread.call(partial(self.aclose, drain=wait)).result()
+            self._loop_thread.stop(cancel=not wait)
+            return
+        if self._sessions is not None:
+            self._sessions.clear()
+        self._pools.shutdown(wait=wait)
+
+
+def _indexed(index: int, fn: Callable) -> Callable:
+    async def wrapper(*args, **kwargs):
+        try:
+            return index, await fn(*args, **kwargs)
+        except Exception as e:
+            return index, e
+
+    return wrapper
 
 
 @final
@@ -5,3 +5,11 @@ class RouteException(Exception):
 class RouteInternalException(RouteException):
     def __init__(self, e):
         super().__init__(e)
+
+
+class RouteTimeoutException(RouteInternalException):
+    pass
+
+
+class AdmissionRejectedException(Exception):
+    pass
@@ -3,10 +3,13 @@ from ajenga.typing import Awaitable
 from ajenga.typing import Callable
 from ajenga.typing import Generic
 from ajenga.typing import Hashable
+from ajenga.typing import List
+from ajenga.typing import Optional
+from ajenga.typing import Sequence
 from ajenga.typing import TypeVar
 from ajenga.typing import Union
 
-from .utils import wrap_function
+from .utils import run_async, wrap_function
 
 T = TypeVar('T')
 
@@ -26,6 +29,20 @@ class KeyFunction(ABC, Generic[T]):
     def __id__(self) -> Hashable:
         return self.___id___ or id(self)
 
+    @property
+    def cacheable(self) -> bool:
+        """Indicate results can be shared across events through a KeyCache"""
+        return False
+
+    async def cache_key(self, *args, **kwargs) -> Hashable:
+        """Key identifying the inputs of the function, for cacheable functions"""
+        raise NotImplementedError
+
+    @property
+    def timeout(self) -> Optional[float]:
+        """Seconds routing waits for the function before failing the branch"""
+        return None
+
     def __hash__(self):
         return self.__id__.__hash__()
 
@@ -34,14 +51,29 @@ class KeyFunction(ABC, Generic[T]):
 
 
 class RawKeyFunctionImpl(KeyFunction[T]):
-    def __init__(self, func: Callable[..., Awaitable[T]], *, key=None, id_=None):
+    def __init__(self, func: Callable[..., Awaitable[T]], *, key=None, id_=None,
+                 cache_key: Optional[Callable[..., Awaitable[Hashable]]] = None,
+                 timeout: Optional[float] = None):
         super().__init__(id_)
         self._func = func
         self._key = key
+        self._cache_key = cache_key
+        self._timeout = timeout
 
     async def __call__(self, *args, **kwargs) -> T:
         return await self._func(*args, **kwargs)
 
+    @property
+    def cacheable(self) -> bool:
+        return self._cache_key is not None
+
+    async def cache_key(self, *args, **kwargs) -> Hashable:
+        return await self._cache_key(*args, **kwargs)
+
+    @property
+    def timeout(self) -> Optional[float]:
+        return self._timeout
+
     @property
     def key(self) -> Union[Hashable, KeyFunction]:
         return self._key or self
@@ -55,8 +87,11 @@ class RawKeyFunctionImpl(KeyFunction[T]):
 
 
 class KeyFunctionImpl(RawKeyFunctionImpl[T]):
-    def __init__(self, func: Callable[..., Union[Awaitable[T], T]], *, key=None, id_=None):
-        super().__init__(wrap_function(func), key=key, id_=id_)
+    def __init__(self, func: Callable[..., Union[Awaitable[T], T]], *, key=None, id_=None,
+                 cache_key: Optional[Callable[..., Union[Awaitable[Hashable], Hashable]]] = None,
+                 timeout: Optional[float] = None):
+        super().__init__(wrap_function(func), key=key, id_=id_,
+                         cache_key=cache_key and wrap_function(cache_key), timeout=timeout)
 
 
 class PredicateFunction(KeyFunctionImpl[bool]):
@@ -71,6 +106,43 @@ class PredicateFunction(KeyFunctionImpl[bool]):
             return f'<{type(self).__name__}: {self._func}>'
 
 
+class BatchKeyFunction(KeyFunctionImpl[T]):
+    """Key function with a vectorized implementation for batch routing
+
+    The batch function takes the list of events and returns a sequence of keys
+    aligned with it, e.g. a list or a NumPy array. The event of each state is
+    bound by the argument function like a key function, the first positional
+    argument by default. Without a per-event function, single events are
+    evaluated as a batch of one.
+    """
+
+    def __init__(self,
+                 batch_func: Callable[[List], Union[Awaitable[Sequence[T]], Sequence[T]]],
+                 func: Optional[Callable[..., Union[Awaitable[T], T]]] = None,
+                 *, argument: Optional[Callable] = None, key=None, id_=None,
+                 cache_key: Optional[Callable[..., Union[Awaitable[Hashable], Hashable]]] = None,
+                 timeout: Optional[float] = None):
+        self._batch_func = batch_func
+        self._argument = wrap_function(argument or (lambda _x_: _x_))
+        super().__init__(func or self._batch_one, key=key, id_=id_, cache_key=cache_key, timeout=timeout)
+        if func is None:
+            self._func = self._batch_one
+
+    async def _batch_one(self, state, mapping) -> T:
+        return (await self.batch([await self.argument(state, mapping)]))[0]
+
+    async def argument(self, state, mapping):
+        """Bind the event of a state passed to the batch function"""
+        return await self._argument(state, mapping)
+
+    async def batch(self, events: List) -> List[T]:
+        keys = await run_async(self._batch_func, events)
+        keys = keys.tolist() if hasattr(keys, 'tolist') else list(keys)
+        if len(keys) != len(events):
+            raise ValueError(f'{self} returned {len(keys)} keys for {len(events)} events!')
+        return keys
+
+
 KeyFunction_T = Union[KeyFunction[T], Callable[..., Union[Awaitable[T], T]]]
 PredicateFunction_T = KeyFunction_T[bool]
 
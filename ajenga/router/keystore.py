@@ -1,34 +1,171 @@
 import asyncio
+import time
+from functools import partial
 
-from ajenga.typing import Any, Dict, Hashable, Mapping, TypeVar, Union
+from ajenga.typing import (TYPE_CHECKING, Any, Dict, Hashable, Iterable, List,
+                           Mapping, Optional, Tuple, TypeVar, Union)
 
-from .keyfunc import KeyFunction
+from .exceptions import RouteTimeoutException
+from .keycache import KeyCache
+from .keyfunc import BatchKeyFunction, KeyFunction
+from .singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from .routecache import RouteTrace
 
 T = TypeVar('T')
 
+_missing = object()
+
 
 class KeyStore:
     _tasks: Dict[Union[Hashable, KeyFunction], asyncio.Task]
     _store: Dict[Union[Hashable, KeyFunction], Any]
+    _prefetched: Dict[KeyFunction, Tuple[Dict, asyncio.Future]]
+    _started: Dict[KeyFunction, float]
+    trace: "Optional[RouteTrace]" = None
 
-    def __init__(self, items: Mapping = {}):
+    def __init__(self, items: Mapping = {}, *,
+                 cache: Optional[KeyCache] = None,
+                 flights: Optional[SingleFlight] = None,
+                 deadline: Optional[float] = None):
+        """
+        :param deadline: time.monotonic() past which consulting key functions fails
+        """
         self._tasks = {}
         self._store = {}
+        self._prefetched = {}
+        self._started = {}
+        self._cache = cache
+        self._flights = flights
+        self.deadline = deadline
         if items:
             self.update(items)
 
-    async def __call__(self, _key_function: KeyFunction[T], state) -> T:
+    async def __call__(self, _key_function: KeyFunction[T], state, *, depends: bool = True) -> T:
+        """Evaluate a key function once per store
+
+        :param depends: Whether routing depends on the value, False for processors
+        """
+        if self.trace is not None:
+            return await self.trace.observe(self, _key_function, state, depends)
+        return await self._call(_key_function, state)
+
+    async def _call(self, _key_function: KeyFunction[T], state) -> T:
         if _key_function not in self._tasks:
-            self._tasks[_key_function] = asyncio.ensure_future(_key_function(state, state.build()))
+            mapping = state.build()
+            prefetched = self._prefetched.pop(_key_function, None)
+            if prefetched and prefetched[0] == mapping:
+                self._tasks[_key_function] = prefetched[1]
+            else:
+                if prefetched:
+                    _discard(prefetched[1])
+                self._tasks[_key_function] = self._start(_key_function, state, mapping)
         task = self._tasks[_key_function]
-        if task.done():
-            return await task
-        else:
-            ret = await task
-            self._store[_key_function] = ret
-            if not isinstance(_key_function.key, KeyFunction):
-                state[_key_function.key] = _key_function
-            return ret
+        if not task.done():
+            timeout = self._budget(_key_function)
+            if timeout is not None:
+                await asyncio.wait((task,), timeout=max(timeout, 0))
+                if not task.done():
+                    # Later consults of the key function fail at once
+                    _discard(task)
+                    task = self._tasks[_key_function] = asyncio.get_running_loop().create_future()
+                    task.set_exception(RouteTimeoutException(
+                        asyncio.TimeoutError(f'{_key_function} exceeded its routing budget')))
+        ret = await task
+        # Also bind the key in the current path when evaluated elsewhere before
+        self._set(_key_function, state, ret)
+        return ret
+
+    def _budget(self, _key_function: KeyFunction) -> Optional[float]:
+        """Seconds left to wait for a key function, its timeout counting from its start"""
+        now = time.monotonic()
+        timeout = _key_function.timeout
+        if timeout is not None:
+            timeout -= now - self._started.get(_key_function, now)
+        if self.deadline is not None:
+            remaining = self.deadline - now
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def _start(self, _key_function: KeyFunction[T], state, mapping: Dict) -> asyncio.Future:
+        self._started[_key_function] = time.monotonic()
+        if (self._cache is not None or self._flights is not None) and _key_function.cacheable:
+            return asyncio.ensure_future(self._evaluate_shared(_key_function, state, mapping))
+        return asyncio.ensure_future(_key_function(state, mapping))
+
+    def prefetch(self, key_functions: Iterable[KeyFunction], state):
+        """Start evaluating key functions ahead of routing
+
+        A prefetched result is only used if routing consults the key function with
+        the same path mapping, otherwise it is discarded and evaluated again.
+        """
+        mapping = state.build()
+        for key_function in key_functions:
+            if key_function not in self._tasks and key_function not in self._prefetched:
+                self._prefetched[key_function] = (mapping, self._start(key_function, state, mapping))
+
+    def discard_prefetched(self):
+        """Cancel prefetched evaluations routing did not consult"""
+        for _, task in self._prefetched.values():
+            _discard(task)
+        self._prefetched.clear()
+
+    async def _evaluate_shared(self, _key_function: KeyFunction[T], state, mapping) -> T:
+        cache_key = (_key_function, await _key_function.cache_key(state, mapping))
+        if self._cache is not None:
+            value = self._cache.get(cache_key, _missing)
+            if value is not _missing:
+                return value
+        if self._flights is not None:
+            return await self._flights.do(cache_key,
+                                          partial(self._evaluate, _key_function, state, mapping, cache_key))
+        return await self._evaluate(_key_function, state, mapping, cache_key)
+
+    async def _evaluate(self, _key_function: KeyFunction[T], state, mapping, cache_key) -> T:
+        value = await _key_function(state, mapping)
+        if self._cache is not None:
+            self._cache.put(cache_key, value)
+        return value
+
+    def _set(self, _key_function: KeyFunction[T], state, value: T):
+        self._store[_key_function] = value
+        if not isinstance(_key_function.key, KeyFunction):
+            state[_key_function.key] = _key_function
+
+    @staticmethod
+    async def gather(_key_function: KeyFunction[T], states) -> List[Union[T, BaseException]]:
+        """Evaluate a key function for a batch of states, each in its own store
+
+        Exceptions are returned in place of the key like asyncio.gather,
+        batch key functions are invoked once for states not evaluated yet
+        """
+        if isinstance(_key_function, BatchKeyFunction):
+            futures, events = [], []
+            for state in states:
+                if _key_function in state.store._tasks:
+                    continue
+                future = state.store._tasks[_key_function] = asyncio.get_running_loop().create_future()
+                state.store._started[_key_function] = time.monotonic()
+                try:
+                    events.append(await _key_function.argument(state, state.build()))
+                except Exception as e:
+                    # Only fails the state the event cannot be bound for
+                    future.set_exception(e)
+                else:
+                    futures.append((state, future))
+            if futures:
+                # Run aside, so each state waits for its key only within its budget
+                batch = asyncio.ensure_future(_key_function.batch(events))
+                batch.add_done_callback(partial(_resolve_batch, _key_function, futures))
+                try:
+                    return await asyncio.gather(*(state.store(_key_function, state) for state in states),
+                                                return_exceptions=True)
+                finally:
+                    _discard(batch)
+
+        return await asyncio.gather(*(state.store(_key_function, state) for state in states),
+                                    return_exceptions=True)
 
     def get(self, key: Union[Hashable, KeyFunction], default=None):
         return self._store.get(key, self._tasks.get(key, default))
@@ -51,6 +188,32 @@ class KeyStore:
         return self._store.items()
 
 
+def _discard(task: asyncio.Future):
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        # Retrieve to silence never retrieved warnings
+        task.exception()
+
+
+def _resolve_batch(_key_function: KeyFunction, futures: List[Tuple[Any, asyncio.Future]], batch: asyncio.Future):
+    if batch.cancelled():
+        keys, error = None, asyncio.CancelledError()
+    else:
+        keys, error = None, batch.exception()
+        if error is None:
+            keys = batch.result()
+    for index, (state, future) in enumerate(futures):
+        # Skip states which gave up on the key past its budget
+        if future.done():
+            continue
+        if keys is None:
+            future.set_exception(error)
+        else:
+            state.store._set(_key_function, state, keys[index])
+            future.set_result(keys[index])
+
+
 class NoneKeyStore(KeyStore):
-    async def __call__(self, _key_function: KeyFunction[T], *args, **kwargs) -> T:
+    async def __call__(self, _key_function: KeyFunction[T], *args, depends: bool = True, **kwargs) -> T:
         return await _key_function(*args, **kwargs)
@@ -0,0 +1,153 @@
+import math
+import time
+
+from ajenga.typing import Any, Callable, Optional, Set
+
+
+class AdaptiveLimit:
+    """Concurrency limit adjusted from observed handler latency (AIMD)
+
+    While latency stays under the threshold and the limit is in use, the limit
+    grows by about one per limit completions. Above the threshold it shrinks by
+    backoff. The threshold is target_latency if given, else tolerance times the
+    lowest latency observed over the last one or two windows of samples, so
+    that an outlier does not hold the limit down for good.
+    """
+
+    def __init__(self,
+                 initial: int = 20,
+                 min_limit: int = 1,
+                 max_limit: int = 200,
+                 target_latency: Optional[float] = None,
+                 tolerance: float = 2.0,
+                 backoff: float = 0.9,
+                 smoothing: float = 0.2,
+                 window: int = 100,
+                 ):
+        if not 0 < min_limit <= initial <= max_limit:
+            raise ValueError('Limit bounds should satisfy 0 < min_limit <= initial <= max_limit!')
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.window = window
+        self._limit = float(initial)
+        self.latency: Optional[float] = None
+        self.min_latency: Optional[float] = None
+        # Minimums of the previous and the current window
+        self._last_min = math.inf
+        self._window_min = math.inf
+        self.samples = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def threshold(self) -> Optional[float]:
+        if self.target_latency is not None:
+            return self.target_latency
+        return self.min_latency * self.tolerance if self.min_latency is not None else None
+
+    def on_sample(self, latency: float, inflight: int) -> None:
+        """Record the latency of a completed handler
+
+        :param latency: Seconds from start to completion
+        :param inflight: Handlers running when it completed, including itself
+        """
+        self.samples += 1
+        self.latency = latency if self.latency is None else \
+            self.latency + self.smoothing * (latency - self.latency)
+        self._window_min = min(self._window_min, latency)
+        if not self.samples % self.window:
+            self._last_min, self._window_min = self._window_min, math.inf
+        self.min_latency = min(self._last_min, self._window_min)
+
+        threshold = self.threshold
+        if threshold is not None and self.latency > threshold:
+            self._limit = max(self.min_limit, self._limit * self.backoff)
+        elif inflight * 2 >= self._limit:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+    @property
+    def stats(self) -> dict:
+        return {'limit': self.limit, 'latency': self.latency,
+                'min_latency': self.min_latency, 'samples': self.samples}
+
+
+DELAY = 'delay'
+DROP = 'drop'
+
+
+class Throttle:
+    """Concurrency cap and token bucket rate of a handler, shared by all events
+
+    Tasks over the limits are delayed until a slot or token frees up, or dropped,
+    according to the policy.
+    """
+
+    def __init__(self,
+                 max_concurrency: Optional[int] = None,
+                 rate: Optional[float] = None,
+                 burst: Optional[int] = None,
+                 policy: str = DELAY,
+                 ):
+        """
+        :param max_concurrency: Max tasks of the handler running at once
+        :param rate: Tokens added per second, one taken by each task started
+        :param burst: Capacity of the bucket, rate rounded up by default
+        """
+        if policy not in (DELAY, DROP):
+            raise ValueError(f'Unknown throttle policy {policy}, should be {DELAY} or {DROP}!')
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, math.ceil(rate or 0))
+        self.policy = policy
+        self.running = 0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: Set[Callable[[], Any]] = set()
+        self.started = 0
+        self.delayed = 0
+        self.dropped = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> bool:
+        if self.max_concurrency is not None and self.running >= self.max_concurrency:
+            return False
+        if self.rate is not None:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+        self.running += 1
+        self.started += 1
+        return True
+
+    def release(self) -> None:
+        self.running -= 1
+        if self._waiters:
+            waiters, self._waiters = self._waiters, set()
+            for wake in waiters:
+                wake()
+
+    def wait(self, wake: Callable[[], Any]) -> Optional[float]:
+        """Have wake called once a slot frees up
+
+        :return: Seconds until a token is available, None if waiting for a slot
+        """
+        if self.max_concurrency is not None and self.running >= self.max_concurrency:
+            self._waiters.add(wake)
+            return None
+        return max(0., (1 - self._tokens) / self.rate)
+
+    @property
+    def stats(self) -> dict:
+        return {'running': self.running, 'started': self.started,
+                'delayed': self.delayed, 'dropped': self.dropped}
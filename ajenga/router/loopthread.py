@@ -0,0 +1,109 @@
+import asyncio
+import collections
+import concurrent.futures
+import threading
+
+from ajenga.typing import Any, Awaitable, Callable, Deque, Optional, Set, Tuple
+
+
+class LoopThread:
+    """Event loop running in a dedicated thread, fed by other threads
+
+    Calls handed over while the loop has not picked up earlier ones are
+    batched, so that a burst of calls wakes the loop once.
+    """
+    _inbox: "Deque[Tuple[Callable[[], Awaitable], concurrent.futures.Future]]"
+
+    def __init__(self, name: str = 'ajenga-router-loop'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._inbox = collections.deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._stopping = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self) -> "LoopThread":
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    def is_current(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def call(self, fn: Callable[[], Awaitable[Any]]) -> concurrent.futures.Future:
+        """Run a coroutine function on the loop from any thread
+
+        :return: Future of its result
+        """
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError('Loop thread is stopped!')
+            self._inbox.append((fn, future))
+            schedule, self._scheduled = not self._scheduled, True
+        if schedule:
+            self.loop.call_soon_threadsafe(self._drain)
+        return future
+
+    def _drain(self):
+        with self._lock:
+            calls = list(self._inbox)
+            self._inbox.clear()
+            self._scheduled = False
+        for fn, future in calls:
+            if future.set_running_or_notify_cancel():
+                task = self.loop.create_task(fn())
+                task.add_done_callback(_resolve(future))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    def stop(self, cancel: bool = False, timeout: Optional[float] = None) -> None:
+        """Stop the loop once calls handed over are done, and wait for the thread to exit
+
+        :param cancel: Cancel calls still running instead of waiting for them
+        """
+        with self._lock:
+            self._stopping = True
+        if self._thread.is_alive():
+            self.loop.call_soon_threadsafe(self._stop, cancel)
+            if not self.is_current():
+                self._thread.join(timeout)
+
+    def _stop(self, cancel: bool):
+        self._drain()
+        self.loop.create_task(self._shutdown(cancel))
+
+    async def _shutdown(self, cancel: bool):
+        if self._tasks:
+            if cancel:
+                for task in self._tasks:
+                    task.cancel()
+            # Futures are resolved by the callbacks of the tasks, which run first
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Tasks left behind, e.g. handlers of forwards stopped early
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.stop()
+
+
+def _resolve(future: concurrent.futures.Future):
+    def callback(task: asyncio.Future):
+        if task.cancelled():
+            future.set_exception(concurrent.futures.CancelledError())
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    return callback
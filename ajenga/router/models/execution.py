@@ -1,14 +1,29 @@
 import asyncio
 import contextvars
+import itertools
+import math
+import sys
 import time
 from abc import ABC
 from asyncio import CancelledError
+from functools import partial
 
-from ajenga.typing import AsyncIterable, Optional, Set
+from ajenga.typing import (Any, AsyncIterable, Callable, Dict, Hashable,
+                           Iterable, List, Optional, Set, Tuple, Union)
 
+from ..limit import DROP, AdaptiveLimit
 from ..pqueue import PriorityQueue
 
 
+# Tasks starting synchronously until their first suspension, since Python 3.12
+_EAGER_START = sys.version_info >= (3, 12)
+
+# Outcomes a task future resolves to, as (outcome, task, value)
+_RETURN = 'return'
+_PAUSE = 'pause'
+_ERROR = 'error'
+
+
 class Priority:
     """
     TODO: More complete priority
@@ -38,23 +53,43 @@ class Priority:
 
 
 class Task:
+    """Unit of execution for a handler, which may pause and resume
+
+    Options other than the declared ones are kept in options, and read as attributes.
+    """
+    __slots__ = ('fn', '_loop', 'priority', 'deadline', '_state', 'args', 'kwargs', 'count_finished',
+                 '_task', 'executor', 'sessions', 'session_key', 'throttle', 'options', 'last_active_time',
+                 'paused_at', '_throttled', '_future_return', '_future_pause', '_cancelled')
+
     args: tuple
     kwargs: dict
-    state: dict
 
     def __init__(self, fn, *,
                  loop=None,
                  priority=Priority.Default,
+                 deadline=None,
                  state=None,
                  args=None,
                  kwargs=None,
+                 count_finished=True,
+                 sessions=None,
+                 throttle=None,
                  **_kwargs) -> None:
         self.fn = fn
-        self.loop = loop or asyncio.get_event_loop()
+        self._loop = loop
         self.priority = priority
-        self.state = state or {}
-        for key, value in _kwargs.items():
-            setattr(self, key, value)
+        # Monotonic time after which the task is dropped instead of started
+        self.deadline = deadline
+        self._state = state
+        self.count_finished = count_finished
+        # SessionRegistry tracking the task while paused
+        self.sessions = sessions
+        self.session_key = None
+        # Throttle of the handler, enforced by PriorityExecutor and on resume
+        self.throttle = throttle
+        # Whether the task holds a slot of the throttle
+        self._throttled = False
+        self.options = _kwargs
 
         self.args = args or ()
         self.kwargs = kwargs or {}
@@ -62,11 +97,50 @@ class Task:
         self._task = None
         self.executor = None
         self.last_active_time = time.time()
+        # Monotonic time of the last pause, for idle expiry
+        self.paused_at = None
         self._future_return = None
         self._future_pause = None
-        self.cancelled = False
+        self._cancelled = False
+
+    def __getattr__(self, name):
+        try:
+            return object.__getattribute__(self, 'options')[name]
+        except (AttributeError, KeyError):
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}') from None
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    @loop.setter
+    def loop(self, value):
+        self._loop = value
+
+    @property
+    def state(self) -> dict:
+        if self._state is None:
+            self._state = {}
+        return self._state
+
+    @state.setter
+    def state(self, value: dict):
+        self._state = value
 
     def run(self, *args, **kwargs):
+        return self._run(args, kwargs, eager=False)
+
+    def run_eager(self, *args, **kwargs):
+        """Run the handler in an eager task, starting at once until it first suspends
+
+        The returned future is already done when the handler returned or paused
+        without suspending. Eager tasks need Python 3.12, before which this is run.
+        """
+        return self._run(args, kwargs, eager=True)
+
+    def _run(self, args, kwargs, eager: bool):
         if not args and not kwargs:
             args, kwargs = self.args, self.kwargs
         if self.running and self.paused:
@@ -82,12 +156,12 @@ class Task:
                 res = await self.fn(*args, **kwargs)
                 if not self.cancelled:
                     assert self._future_return
-                    self._future_return.set_exception(_ReturnException(self, res))
+                    self._future_return.set_result((_RETURN, self, res))
             except Exception as e:
                 # print(f'? {e} {type(e)}')
                 if not self.cancelled:
                     assert self._future_return
-                    self._future_return.set_exception(e)
+                    self._future_return.set_result((_ERROR, self, e))
             finally:
                 _task_context.reset(token)
 
@@ -96,7 +170,12 @@ class Task:
         self.last_active_time = time.time()
         self.executor = _executor_context.get(None)
         self._future_return = self.loop.create_future()
-        self._task = self.loop.create_task(_wrapper())
+        if self._throttled:
+            self._future_return.add_done_callback(self._release_throttle)
+        if eager and _EAGER_START:
+            self._task = asyncio.Task(_wrapper(), loop=self.loop, eager_start=True)
+        else:
+            self._task = self.loop.create_task(_wrapper())
         return self._future_return
 
     @property
@@ -123,7 +202,22 @@ class Task:
     def cancelled(self, value):
         self._cancelled = value
 
-    async def pause(self):
+    def cancel(self):
+        """Cancel the task, a paused one is woken up with CancelledError"""
+        self._cancelled = True
+        if self._future_pause is not None:
+            # Delivered through the awaited future, within the task's own context
+            self._future_pause.cancel()
+        elif self._task and not self._task.done():
+            self._task.cancel()
+
+    async def pause(self, session_key: Hashable = None):
+        """Suspend the task until resumed
+
+        :param session_key: Key of the session, by which the engine resumes the task
+                            with the next event of the session
+        :return: (args, kwargs) the task is resumed with
+        """
         # Check current context
         if _task_context.get() != self:
             raise InvalidStateError('Cannot pause a task from outside context!')
@@ -131,8 +225,14 @@ class Task:
             return
 
         self._future_pause = self.loop.create_future()
+        self.session_key = session_key
+        # Resuming may raise the priority to schedule the task, only until it runs
+        priority = self.priority
+        self.paused_at = time.monotonic()
         assert self._future_return
-        self._future_return.set_exception(_PauseException(self))
+        self._future_return.set_result((_PAUSE, self, None))
+        if self.sessions is not None:
+            self.sessions.add(self)
         try:
             res = await self._future_pause
         except CancelledError:
@@ -140,6 +240,9 @@ class Task:
             raise
         finally:
             self._future_pause = None
+            self.priority = priority
+            if self.sessions is not None:
+                self.sessions.discard(self)
         return res
 
     def resume(self, *args, **kwargs):
@@ -152,7 +255,7 @@ class Task:
         self.executor = _executor_context.get(None)
         self._future_return = self.loop.create_future()
         assert self._future_pause
-        self._future_pause.set_result((args, kwargs))
+        self._continue(partial(self._future_pause.set_result, (args, kwargs)), self._future_return)
         return self._future_return
 
     def raise_(self, exception):
@@ -163,15 +266,69 @@ class Task:
         self.executor = _executor_context.get(None)
         self._future_return = self.loop.create_future()
         assert self._future_pause
-        self._future_pause.set_exception(exception)
+        self._continue(partial(self._future_pause.set_exception, exception), self._future_return)
         return self._future_return
 
+    def _continue(self, wake: Callable[[], Any], future: asyncio.Future, retry: bool = False):
+        """Wake the paused task up once it holds a slot of its throttle
+
+        Taken here when resumed directly rather than by an executor, over the
+        limits the task is delayed, or stays paused as the future yields ThrottledError.
+        """
+        if future is not self._future_return or not self.paused:
+            # Resumed otherwise or cancelled meanwhile
+            return
+        throttle = self.throttle
+        if throttle is not None and not self._throttled and not self._take_throttle():
+            if throttle.policy == DROP:
+                throttle.dropped += 1
+                future.set_result((_ERROR, self, ThrottledError(self)))
+                return
+            if not retry:
+                throttle.delayed += 1
+            retry = partial(self._continue, wake, future, True)
+            delay = throttle.wait(retry)
+            if delay is not None:
+                self.loop.call_later(delay, retry)
+            return
+        if self._throttled:
+            future.add_done_callback(self._release_throttle)
+        wake()
+
+    def _take_throttle(self) -> bool:
+        self._throttled = self.throttle.acquire()
+        return self._throttled
+
+    def _release_throttle(self, _future: asyncio.Future):
+        # Paused, finished or cancelled alike
+        self._throttled = False
+        self.throttle.release()
+
     @staticmethod
     def current() -> "Task":
         return _task_context.get()
 
 
+class SchedulingPolicy:
+    """Order in which an executor starts its waiting tasks, smaller keys first
+
+    Tasks of higher priority always start first, policies order within a priority.
+    """
+
+    def key(self, task: Task) -> Any:
+        return -task.priority
+
+
+class EarliestDeadlineFirst(SchedulingPolicy):
+    """Start tasks of the same priority by earliest deadline, tasks without one last"""
+
+    def key(self, task: Task) -> Any:
+        return -task.priority, task.deadline if task.deadline is not None else math.inf
+
+
 class Executor(ABC):
+    policy: Optional[SchedulingPolicy] = None
+    stopped: bool = False
 
     def create_task(self, fn, **kwargs) -> Task:
         raise NotImplementedError
@@ -179,10 +336,34 @@ class Executor(ABC):
     def add_task(self, task: Task):
         raise NotImplementedError
 
+    def add_tasks(self, tasks: Iterable[Task]):
+        for task in tasks:
+            self.add_task(task)
+
     async def run(self, *args, **kwargs) -> AsyncIterable:
         raise NotImplementedError
         yield
 
+    def hold(self, priority: Optional[int]):
+        """Keep run waiting for tasks added later, starting only tasks with at least the priority
+
+        Used to stream tasks in while they are still being routed
+
+        :param priority: Max priority of tasks that may still be added, None for any
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release the hold, no more tasks will be added"""
+        raise NotImplementedError
+
+    def stop(self):
+        """Stop propagating the event, discarding waiting tasks and cancelling running ones
+
+        The calling task carries on, and its result is still yielded
+        """
+        raise NotImplementedError
+
     @staticmethod
     def current() -> "Executor":
         exc = Task.current().executor
@@ -191,104 +372,376 @@ class Executor(ABC):
 
 
 class SimpleExecutor(Executor):
+    """Run all tasks at once regardless of priority, without worker limit"""
 
-    def __init__(self) -> None:
+    def __init__(self, scheduler: "Optional[Scheduler]" = None) -> None:
+        if scheduler is not None:
+            raise ValueError('SimpleExecutor does not support a scheduler!')
         self.tasks = []
+        self.hold_priority = None
+        self.holding = False
+        self._pending: Dict[asyncio.Future, Task] = {}
+        self._wakeup: Optional[asyncio.Future] = None
 
     def create_task(self, fn, **kwargs):
         task = Task(fn, **kwargs)
-        self.tasks.append(task)
+        self.add_task(task)
         return task
 
     def add_task(self, task):
+        if self.stopped:
+            return
         self.tasks.append(task)
+        self._wake()
+
+    def hold(self, priority: Optional[int]):
+        self.holding = True
+        self.hold_priority = priority
+        self._wake()
+
+    def close(self):
+        self.holding = False
+        self.hold_priority = None
+        self._wake()
+
+    def stop(self):
+        self.stopped = True
+        self.close()
+        for task in self.tasks:
+            _unclaim(task)
+        self.tasks.clear()
+        current = _task_context.get(None)
+        for future, task in self._pending.items():
+            if task is not current:
+                task.cancel()
+                future.cancel()
+
+    def _wake(self):
+        if self._wakeup and not self._wakeup.done():
+            self._wakeup.set_result(None)
 
     async def run(self, *args, **kwargs):
-        pending = [task.run(*args, **kwargs) for task in self.tasks]
-        self.tasks.clear()
-        while pending:
-            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
-            for future in done:
-                try:
-                    yield await future
-                except _PauseException:
-                    pass
-                except _ReturnException as e:
-                    yield e.args[1] if e.args else None
-                except Exception as e:
-                    yield e
+        token = _executor_context.set(self)
+        try:
+            while self.tasks or self._pending or self.holding:
+                if self.hold_priority is None:
+                    starting, self.tasks = self.tasks, []
+                else:
+                    starting = [task for task in self.tasks if task.priority >= self.hold_priority]
+                    self.tasks = [task for task in self.tasks if task.priority < self.hold_priority]
+                for task in starting:
+                    self._pending[task.run(*args, **kwargs)] = task
+
+                self._wakeup = asyncio.get_running_loop().create_future()
+                done, _ = await asyncio.wait(set(self._pending) | {self._wakeup},
+                                             return_when=asyncio.FIRST_COMPLETED)
+                self._wakeup.cancel()
+                self._wakeup = None
+                for future in done:
+                    if self._pending.pop(future, None) is None or future.cancelled():
+                        continue
+                    kind, _, value = future.result()
+                    if kind is not _PAUSE:
+                        yield value
+        finally:
+            _executor_context.reset(token)
+
+
+class Scheduler:
+    """Global worker limit shared by the executors of all in-flight events
+
+    A free worker goes to the waiting executor whose next task has the highest
+    priority, then to the one running the fewest tasks, then first come first served.
+    """
+    _waiters: "Dict[PriorityExecutor, Tuple[int, int]]"
+    _granted: "Dict[PriorityExecutor, int]"
+
+    def __init__(self, max_workers: Union[int, AdaptiveLimit] = 100) -> None:
+        self.max_workers = max_workers
+        self.running = 0
+        self._waiters = {}
+        self._granted = {}
+        self._counter = itertools.count()
+
+    def acquire(self, executor: "PriorityExecutor", priority: int) -> bool:
+        """Take a worker for the executor, or queue it to be woken up when one is granted"""
+        granted = self._granted.get(executor)
+        if granted:
+            if granted == 1:
+                del self._granted[executor]
+            else:
+                self._granted[executor] = granted - 1
+            return True
+        if self.running < _limit(self.max_workers) and not self._waiters:
+            self.running += 1
+            return True
+        seq = self._waiters[executor][1] if executor in self._waiters else next(self._counter)
+        self._waiters[executor] = (priority, seq)
+        return False
+
+    def release(self, n: int = 1) -> None:
+        self.running -= n
+        while self._waiters and self.running < _limit(self.max_workers):
+            executor = min(self._waiters, key=lambda _executor: (-self._waiters[_executor][0],
+                                                                 len(_executor.running_futures),
+                                                                 self._waiters[_executor][1]))
+            del self._waiters[executor]
+            self._granted[executor] = self._granted.get(executor, 0) + 1
+            self.running += 1
+            executor._wake()
+
+    def withdraw(self, executor: "PriorityExecutor") -> None:
+        """Drop the executor from waiting, releasing workers granted but not taken"""
+        self._waiters.pop(executor, None)
+        granted = self._granted.pop(executor, 0)
+        if granted:
+            self.release(granted)
+
+    def is_waiting(self, executor: "PriorityExecutor") -> bool:
+        return executor in self._waiters or executor in self._granted
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
 
 
 class PriorityExecutor(Executor):
 
-    def __init__(self, max_workers=20) -> None:
+    def __init__(self,
+                 max_workers: Union[int, AdaptiveLimit] = 20,
+                 scheduler: Optional[Scheduler] = None,
+                 eager: bool = False,
+                 policy: Optional[SchedulingPolicy] = None,
+                 ) -> None:
+        """
+        :param eager: Start handlers in eager tasks, see Task.run_eager
+        """
         self.max_workers = max_workers
-        self.waiting_tasks: PriorityQueue[Task, int] = PriorityQueue(lambda x: -x.priority)
+        self.scheduler = scheduler
+        self.eager = eager
+        self._finished: List[asyncio.Future] = []
+        # Start times, only tracked to feed adaptive limits
+        self._adaptive = [limit for limit in (max_workers, scheduler and scheduler.max_workers)
+                          if isinstance(limit, AdaptiveLimit)]
+        self._started: Dict[asyncio.Future, float] = {}
+        self._dropped: List[Exception] = []
+        self._delayed: Set[Task] = set()
+        self.policy = policy or SchedulingPolicy()
+        self.waiting_tasks: PriorityQueue[Task, Any] = PriorityQueue(self.policy.key)
         self.running_priority = Priority.Max
         self.running_futures: Set[asyncio.Future] = set()
+        self._running_tasks: Dict[asyncio.Future, Task] = {}
+        self.stopped = False
         self.next_priority = True
         self.num_finished = 0
+        self.hold_priority = None
+        self.holding = False
+        self._wakeup: Optional[asyncio.Future] = None
 
     def create_task(self, fn, *, priority: int = 0, **kwargs):
         task = Task(fn, priority=priority, **kwargs)
-        self.waiting_tasks.push(task)
+        self.add_task(task)
         return task
 
     def add_task(self, task):
+        if self.stopped:
+            return
         self.waiting_tasks.push(task)
+        self._wake()
+
+    def add_tasks(self, tasks):
+        if self.stopped:
+            return
+        self.waiting_tasks.extend(tasks)
+        self._wake()
+
+    def remove_task(self, task: Task) -> bool:
+        """Withdraw a task not started yet"""
+        return self.waiting_tasks.discard(task)
+
+    def reprioritize(self, task: Task, priority: int) -> None:
+        """Change the priority of a task, repositioning it if not started yet"""
+        task.priority = priority
+        if task in self.waiting_tasks:
+            self.waiting_tasks.update(task)
+            self._wake()
+
+    def hold(self, priority: Optional[int]):
+        self.holding = True
+        self.hold_priority = priority
+        self._wake()
+
+    def close(self):
+        self.holding = False
+        self.hold_priority = None
+        self._wake()
+
+    def stop(self):
+        self.stopped = True
+        self.holding = False
+        self.hold_priority = None
+        for task in self.waiting_tasks:
+            _unclaim(task)
+        self.waiting_tasks.clear()
+        self._delayed.clear()
+        if self.scheduler is not None:
+            self.scheduler.withdraw(self)
+        current = _task_context.get(None)
+        for future in self.running_futures:
+            task = self._running_tasks[future]
+            if task is not current:
+                task.cancel()
+                # Resolved so that run frees the worker at once
+                future.cancel()
+        self._wake()
+
+    def _wake(self):
+        if self._wakeup and not self._wakeup.done():
+            self._wakeup.set_result(None)
 
     @property
     def waiting_priority(self):
-        return -self.waiting_tasks.top_key(-Priority.Never)
+        return self.waiting_tasks.top().priority if self.waiting_tasks else Priority.Never
+
+    def _startable(self) -> bool:
+        return self.waiting_tasks \
+            and len(self.running_futures) < _limit(self.max_workers) \
+            and self.waiting_priority >= self.running_priority \
+            and (self.hold_priority is None or self.waiting_priority >= self.hold_priority)
+
+    def _start_tasks(self, args, kwargs):
+        throttled = []
+        while self._startable():
+            if self.scheduler is not None and not self.scheduler.acquire(self, self.waiting_priority):
+                # Woken up once the scheduler grants a worker
+                break
+            task = self.waiting_tasks.pop()
+            if task.deadline is not None and task.deadline <= time.monotonic():
+                if self.scheduler is not None:
+                    self.scheduler.release()
+                self._delayed.discard(task)
+                _unclaim(task)
+                self._dropped.append(DeadlineExceededError(task))
+                continue
+            if task.throttle is not None and not task._take_throttle():
+                if self.scheduler is not None:
+                    self.scheduler.release()
+                self._throttle(task, throttled)
+                continue
+            self._delayed.discard(task)
+            self.running_priority = task.priority
+            started = time.monotonic() if self._adaptive else None
+            future = task.run_eager(*args, **kwargs) if self.eager else task.run(*args, **kwargs)
+            if started is not None and not future.done():
+                # Handlers never suspending took no worker, and would skew the minimum latency
+                self._started[future] = started
+                if not (self.eager and _EAGER_START):
+                    # Runs right after the first step of the task
+                    asyncio.get_running_loop().call_soon(self._unsample, future)
+            # Workers are held until the handler pauses, finishes or is cancelled,
+            # even when the consumer stopped early and left it running
+            if self.scheduler is not None:
+                future.add_done_callback(_release(self.scheduler))
+            if future.done():
+                self._finished.append(future)
+            else:
+                self.running_futures.add(future)
+                self._running_tasks[future] = task
+        # Retried on the next pass, once woken up by the throttle
+        for task in throttled:
+            self.waiting_tasks.push(task)
+
+    def _throttle(self, task: Task, throttled: List[Task]):
+        throttle = task.throttle
+        if throttle.policy == DROP:
+            throttle.dropped += 1
+            _unclaim(task)
+            self._dropped.append(ThrottledError(task))
+            return
+        if task not in self._delayed:
+            throttle.delayed += 1
+            self._delayed.add(task)
+        throttled.append(task)
+        delay = throttle.wait(self._wake)
+        if delay is not None:
+            asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _unsample(self, future: asyncio.Future):
+        if future.done():
+            self._started.pop(future, None)
+
+    def _sample(self, done):
+        now = time.monotonic()
+        inflight = len(self.running_futures) + len(done)
+        for future in done:
+            started = self._started.pop(future, None)
+            if started is not None:
+                for limit in self._adaptive:
+                    limit.on_sample(now - started, inflight)
 
     async def run(self, *args, **kwargs):
         self.next_priority = True
         token = _executor_context.set(self)
         try:
-            while self.waiting_tasks or self.running_futures:
-                while self.waiting_tasks \
-                        and len(self.running_futures) < self.max_workers \
-                        and self.waiting_priority >= self.running_priority:
-                    task = self.waiting_tasks.pop()
-                    self.running_priority = task.priority
-                    self.running_futures.add(task.run(*args, **kwargs))
-                else:
-                    if self.next_priority and self.waiting_priority > Priority.Never and \
+            while self.waiting_tasks or self.running_futures or self.holding:
+                self._start_tasks(args, kwargs)
+                if self.next_priority and self.waiting_priority > Priority.Never and \
                         len(self.running_futures) == 0:
-                        self.running_priority = self.waiting_priority
+                    self.running_priority = self.waiting_priority
+                    self._start_tasks(args, kwargs)
 
-                        while self.waiting_tasks \
-                                and len(self.running_futures) < self.max_workers \
-                                and self.waiting_priority >= self.running_priority:
-                            task = self.waiting_tasks.pop()
-                            self.running_priority = task.priority
-                            self.running_futures.add(task.run(*args, **kwargs))
+                if self._dropped:
+                    dropped, self._dropped = self._dropped, []
+                    for e in dropped:
+                        yield e
 
-                if not self.running_futures:
+                if self._finished:
+                    # Completed inline, yield without waiting
+                    done, self._finished = self._finished, []
+                elif not self.running_futures and not self.holding and not self._delayed and \
+                        not (self.scheduler and self.scheduler.is_waiting(self)):
                     break
-
-                done, self.running_futures = await asyncio.wait(self.running_futures,
-                                                                return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    # Routing may add tasks or lower the hold meanwhile
+                    self._wakeup = asyncio.get_running_loop().create_future()
+                    done, self.running_futures = await asyncio.wait(self.running_futures | {self._wakeup},
+                                                                    return_when=asyncio.FIRST_COMPLETED)
+                    self.running_futures.discard(self._wakeup)
+                    done.discard(self._wakeup)
+                    self._wakeup.cancel()
+                    self._wakeup = None
+                if self._adaptive and done:
+                    self._sample(done)
                 for future in done:
-                    
-                    try:
-                        yield await future
-                    except _PauseException:
-                        pass
-                    except _ReturnException as e:
-                        if len(e.args) == 2:
-                            _task: Task = e.args[0]
-                            if getattr(_task, "count_finished", True):
-                                self.num_finished += 1
-                            yield e.args[1]
-                        else:
-                            yield None
-                    except Exception as e:
-                        yield e
+                    self._running_tasks.pop(future, None)
+                    if future.cancelled():
+                        continue
+                    kind, _task, value = future.result()
+                    if kind is _PAUSE:
+                        continue
+                    if kind is _RETURN and _task.count_finished:
+                        self.num_finished += 1
+                    yield value
         finally:
+            if self.scheduler is not None:
+                self.scheduler.withdraw(self)
             _executor_context.reset(token)
 
 
+def _unclaim(task: Task):
+    # A woken session task not resumed stays reachable by its session key
+    if task.paused and task.sessions is not None:
+        task.sessions.restore(task)
+
+
+def _release(scheduler: Scheduler):
+    return lambda _future: scheduler.release()
+
+
+def _limit(max_workers: Union[int, AdaptiveLimit]) -> int:
+    return max_workers.limit if isinstance(max_workers, AdaptiveLimit) else max_workers
+
+
 _task_context: contextvars.ContextVar[Task] = contextvars.ContextVar('_task_context')
 _executor_context: contextvars.ContextVar[Optional[Executor]] = contextvars.ContextVar('_executor_context')
 
@@ -297,13 +750,17 @@ class InvalidStateError(Exception):
     pass
 
 
-class _ExecutorException(BaseException):
-    pass
+class TaskDroppedError(Exception):
+    """Yielded by the executor in place of the result of a task it did not run"""
 
+    def __init__(self, task: Task):
+        super().__init__(task)
+        self.task = task
 
-class _PauseException(_ExecutorException):
-    pass
 
+class ThrottledError(TaskDroppedError):
+    """Task dropped by the throttle of its handler"""
 
-class _ReturnException(_ExecutorException):
-    pass
+
+class DeadlineExceededError(TaskDroppedError):
+    """Task dropped past its deadline"""
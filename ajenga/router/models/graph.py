@@ -1,12 +1,16 @@
 from collections import deque
 from typing import Optional
 
-from ajenga.typing import Iterable, Set
+from ajenga.typing import TYPE_CHECKING, Dict, Iterable, List, Set
 
 from ..exceptions import RouteException
+from ..state import RouteState
 from . import RouteResult_T
 from .node import IdentityNode, Node, NonterminalNode, TerminalNode
 
+if TYPE_CHECKING:
+    from ..keyfunc import KeyFunction
+
 
 class Graph:
     """State Transition Graph
@@ -94,6 +98,54 @@ class Graph:
                 ret.add(node)
         return ret
 
+    def required_key_functions(self) -> "Set[KeyFunction]":
+        """Key functions consulted on every path to any terminal
+
+        :return:
+        """
+        order: List[Node] = []
+        predecessors: Dict[int, List[Node]] = {id(self.start): []}
+
+        def visit(node: Node):
+            if isinstance(node, NonterminalNode):
+                for successor in node.successors:
+                    if id(successor) not in predecessors:
+                        predecessors[id(successor)] = [node]
+                        visit(successor)
+                    else:
+                        predecessors[id(successor)].append(node)
+            order.append(node)
+
+        visit(self.start)
+
+        required: Dict[int, Set[KeyFunction]] = {}
+        for node in reversed(order):
+            inherited = [required[id(u)] for u in predecessors[id(node)]]
+            required[id(node)] = set.intersection(*inherited) if inherited else set()
+            if isinstance(node, NonterminalNode):
+                required[id(node)].update(node.key_functions)
+
+        terminals = [required[id(node)] for node in order if isinstance(node, TerminalNode)]
+        return set.intersection(*terminals) if terminals else set()
+
+    def terminal_priorities(self, default: int = 0) -> Dict[int, int]:
+        """Max priority of terminals reachable from each nonterminal
+
+        :param default: Priority of terminals without one
+        :return: Priorities by node id
+        """
+        priorities: Dict[int, int] = {}
+
+        def visit(node: NonterminalNode) -> Optional[int]:
+            if id(node) not in priorities:
+                reachable = [getattr(successor, 'priority', default) if isinstance(successor, TerminalNode)
+                             else visit(successor) for successor in node.successors]
+                priorities[id(node)] = max((p for p in reachable if p is not None), default=None)
+            return priorities[id(node)]
+
+        visit(self.start)
+        return {node_id: priority for node_id, priority in priorities.items() if priority is not None}
+
     def verify(self) -> bool:
         for node in self.traverse():
             if isinstance(node, NonterminalNode):
@@ -240,6 +292,17 @@ class Graph:
 
         # return set(res)
 
+    async def route_many(self, states: List[RouteState]) -> List[Set[RouteResult_T]]:
+        """Forward a batch of inputs to the graph together
+
+        :param states: States of each event in the batch
+        :return: Routed results aligned with states
+        """
+        if not self.closed:
+            raise ValueError("Cannot apply on a open graph!")
+
+        return await self.start.route_many(states) if states else []
+
     def debug_fmt(self, indent=1) -> str:
         """Format the debug string
 
@@ -1,11 +1,15 @@
 from abc import ABC
+from contextlib import ExitStack
 
 from ajenga.typing import (TYPE_CHECKING, Any, AsyncIterable, Dict, Hashable,
-                           Iterable, Set, Tuple, final)
+                           Iterable, List, Optional, Set, Tuple, final)
 
 from ..state import RouteState
 from . import RouteResult_T
 
+if TYPE_CHECKING:
+    from ..keyfunc import KeyFunction
+
 
 class Node(ABC):
     """Abstraction class for Node
@@ -127,9 +131,88 @@ class NonterminalNode(Node, ABC):
         """
         raise NotImplementedError
 
+    @staticmethod
+    async def _route_successors(state: RouteState,
+                                nodes: Iterable[Node],
+                                source: Optional[Node] = None,
+                                ) -> Set[RouteResult_T]:
+        """Route through successor nodes reached by state
+
+        :param state:
+        :param nodes:
+        :param source: Node routing all its successors at once, given to let the tracker leave it
+        :return:
+        """
+        res = set()
+        tracker = state.tracker
+        if tracker is not None:
+            nodes = tracker.order(nodes)
+            tracker.enter(nodes, source=source)
+        for node in nodes:
+            if isinstance(node, TerminalNode):
+                routed = state.wrap(node)
+                res.add(routed)
+                if tracker is not None:
+                    tracker.found(routed)
+            elif isinstance(node, NonterminalNode):
+                res |= await node.route(state)
+                if tracker is not None:
+                    tracker.leave(node)
+        return res
+
+    async def route_many(self, states: List[RouteState]) -> List[Set[RouteResult_T]]:
+        """Get terminals routing from the node for a batch of states
+
+        :param states: States of each event in the batch
+        :return: Routed results aligned with states
+        """
+        with ExitStack() as stack:
+            for state in states:
+                stack.enter_context(state)
+            return await self._route_many(states)
+
+    async def _route_many(self, states: List[RouteState]) -> List[Set[RouteResult_T]]:
+        """Get terminals routing from the node for a batch of states
+
+        Fallback routes each state on its own, override to visit successors once per batch
+
+        :param states:
+        :return: Routed results aligned with states
+        """
+        return [await self._route(state) for state in states]
+
+    @staticmethod
+    async def _route_successors_many(states: List[RouteState],
+                                     results: List[Set[RouteResult_T]],
+                                     nodes: Iterable[Node]):
+        """Route the subset of states reaching nodes, collect into results aligned with states
+
+        :param states:
+        :param results:
+        :param nodes:
+        :return:
+        """
+        if not states:
+            return
+        for node in nodes:
+            if isinstance(node, TerminalNode):
+                for state, res in zip(states, results):
+                    res.add(state.wrap(node))
+            elif isinstance(node, NonterminalNode):
+                for res, routed in zip(results, await node.route_many(states)):
+                    res |= routed
+
     def copy(self, node_map: Dict[Node, Node] = ...) -> "NonterminalNode":
         raise NotImplementedError
 
+    @property
+    def key_functions(self) -> "Iterable[KeyFunction]":
+        """Key functions consulted when routing through the node
+
+        :return:
+        """
+        return ()
+
     @property
     def empty(self) -> bool:
         """Indicate the node has not added terminals
@@ -284,10 +367,9 @@ class IdentityNode(NonterminalNode, AbsNode):
             return f'{" ":{indent}}<{type(self).__name__} {str(self)}: \n{out_str}{" ":{indent}}>'
 
     async def _route(self, state: RouteState) -> Set[RouteResult_T]:
-        res = set()
-        for node in self._successors:
-            if isinstance(node, TerminalNode):
-                res.add(state.wrap(node))
-            elif isinstance(node, NonterminalNode):
-                res |= await node.route(state)
-        return res
+        return await self._route_successors(state, self._successors, source=self)
+
+    async def _route_many(self, states: List[RouteState]) -> List[Set[RouteResult_T]]:
+        results = [set() for _ in states]
+        await self._route_successors_many(states, results, self._successors)
+        return results
@@ -0,0 +1,48 @@
+import asyncio
+import contextvars
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from ajenga.typing import Any, Callable, Dict, Optional
+
+THREAD = 'thread'
+PROCESS = 'process'
+
+
+class WorkerPools:
+    """Thread and process pools to offload blocking or CPU-bound handlers
+
+    Pools are created on first use with bounded sizes, and owned by the engine.
+    Functions and arguments sent to the process pool must be picklable.
+    """
+    _pools: Dict[str, Executor]
+
+    def __init__(self, thread_workers: Optional[int] = None, process_workers: Optional[int] = None):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._pools = {}
+
+    def get(self, kind: str) -> Executor:
+        pool = self._pools.get(kind)
+        if pool is None:
+            if kind == THREAD:
+                pool = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix='ajenga-router')
+            elif kind == PROCESS:
+                pool = ProcessPoolExecutor(max_workers=self.process_workers)
+            else:
+                raise ValueError(f'Unknown offload {kind}, should be {THREAD} or {PROCESS}!')
+            self._pools[kind] = pool
+        return pool
+
+    async def run(self, kind: str, func: Callable, *args, **kwargs) -> Any:
+        if kind == THREAD:
+            # Keep Task.current and other context available in the thread
+            call = partial(contextvars.copy_context().run, func, *args, **kwargs)
+        else:
+            call = partial(func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.get(kind), call)
+
+    def shutdown(self, wait: bool = True):
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
+        self._pools.clear()
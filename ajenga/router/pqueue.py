@@ -1,47 +1,126 @@
 import heapq
+import itertools
 from dataclasses import dataclass, field
-from typing import Callable, Generic, Iterable, List, Optional, TypeVar
+from typing import (Callable, Dict, Generic, Iterable, List, Optional,
+                    TypeVar)
 
 _VT = TypeVar('_VT')
 _KT = TypeVar('_KT')
 
+# Item of an entry removed from the queue, skipped once it reaches the top
+_removed = object()
+
 
 @dataclass(order=True)
 class PriorityQueueEntry(Generic[_VT, _KT]):
+    """Former entry of the queue, kept for compatibility"""
     key: _KT
     value: _VT = field(compare=False)
 
 
 class PriorityQueue(Generic[_VT, _KT]):
+    """Binary min-heap indexed by item
+
+    Push and pop run on heapq. Removal and key update invalidate the entry in
+    place, which is skipped once it reaches the top, and the heap is compacted
+    when invalid entries make up half of it. Items must be hashable and unique,
+    equal keys pop in insertion order.
+    """
+
     def __init__(self, key_func: Callable[[_VT], _KT]):
-        self._container: List[PriorityQueueEntry[_VT, _KT]] = []
+        # Entries are [key, insertion order, sequence, item], the unique sequence tells
+        # an updated entry from its invalidated copy, so items are never compared
+        self._container: List[list] = []
+        self._index: Dict[_VT, list] = {}
         self._key_func = key_func
+        self._counter = itertools.count()
+        self._removed = 0
 
     def top(self, default: Optional[_VT] = None) -> Optional[_VT]:
-        return self._container[0].value if self._container else default
+        self._prune()
+        return self._container[0][3] if self._container else default
 
     def top_key(self, default: Optional[_KT] = None) -> Optional[_KT]:
-        return self._container[0].key if self._container else default
+        self._prune()
+        return self._container[0][0] if self._container else default
 
     def pop(self) -> _VT:
-        return heapq.heappop(self._container).value
+        self._prune()
+        item = heapq.heappop(self._container)[3]
+        del self._index[item]
+        return item
 
     def push(self, item: _VT) -> None:
-        heapq.heappush(self._container,
-                       PriorityQueueEntry(self._key_func(item), item))
+        """Add an item not queued yet
+
+        :raise ValueError: The item is already queued, see update
+        """
+        if item in self._index:
+            raise ValueError(f'{item} is already queued!')
+        order = next(self._counter)
+        entry = self._index[item] = [self._key_func(item), order, order, item]
+        heapq.heappush(self._container, entry)
+
+    def remove(self, item: _VT) -> None:
+        entry = self._index.pop(item)
+        entry[3] = _removed
+        self._removed += 1
+        if self._removed * 2 > len(self._container):
+            self._compact()
 
-    def remove(self, item: _VT):
-        self._container.remove(PriorityQueueEntry(self._key_func(item), item))
+    def discard(self, item: _VT) -> bool:
+        if item not in self._index:
+            return False
+        self.remove(item)
+        return True
+
+    def update(self, item: _VT) -> None:
+        """Reposition an item after its key changed"""
+        order = self._index[item][1]
+        self.remove(item)
+        entry = self._index[item] = [self._key_func(item), order, next(self._counter), item]
+        heapq.heappush(self._container, entry)
 
     def extend(self, items: Iterable[_VT]) -> None:
+        """Add items, skipping those already queued"""
+        entries = []
         for item in items:
-            self.push(item)
+            if item not in self._index:
+                order = next(self._counter)
+                entry = self._index[item] = [self._key_func(item), order, order, item]
+                entries.append(entry)
+        if len(entries) <= len(self._container):
+            for entry in entries:
+                heapq.heappush(self._container, entry)
+            return
+        # Cheaper to heapify everything at once
+        self._container.extend(entries)
+        heapq.heapify(self._container)
+
+    def clear(self) -> None:
+        self._container.clear()
+        self._index.clear()
+        self._removed = 0
+
+    def _prune(self) -> None:
+        container = self._container
+        while container and container[0][3] is _removed:
+            heapq.heappop(container)
+            self._removed -= 1
+
+    def _compact(self) -> None:
+        self._container = [entry for entry in self._container if entry[3] is not _removed]
+        heapq.heapify(self._container)
+        self._removed = 0
+
+    def __contains__(self, item: _VT) -> bool:
+        return item in self._index
 
     def __bool__(self):
-        return bool(self._container)
+        return bool(self._index)
 
     def __len__(self):
-        return len(self._container)
+        return len(self._index)
 
     def __iter__(self):
-        return map(lambda _entry: _entry.value, self._container)
+        return iter(self._index)
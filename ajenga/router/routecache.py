@@ -0,0 +1,125 @@
+from ajenga.typing import (Dict, FrozenSet, Hashable, List, Optional, Set,
+                           Union)
+
+from .exceptions import RouteException
+from .keyfunc import KeyFunction
+from .keystore import KeyStore
+from .models import Graph, RouteResult_T
+from .state import RouteResult, RouteState
+
+_root = object()
+_any = object()
+
+
+class RouteTrace:
+    """Key functions consulted by a routing pass, in order, with their values"""
+    entries: List[list]
+
+    def __init__(self):
+        self.entries = []
+        self._index: Dict[KeyFunction, list] = {}
+        self.valid = True
+
+    async def observe(self, store: KeyStore, _key_function: KeyFunction, state: RouteState, depends: bool):
+        entry = self._index.get(_key_function)
+        if entry is None:
+            entry = self._index[_key_function] = [_key_function, state.build(), depends, None]
+            self.entries.append(entry)
+        elif depends:
+            entry[2] = True
+        try:
+            entry[3] = await store._call(_key_function, state)
+        except BaseException:
+            self.valid = False
+            raise
+        return entry[3]
+
+
+class _Decision:
+    __slots__ = ('key_function', 'mapping', 'depends', 'branches')
+
+    def __init__(self, key_function: KeyFunction, mapping: Dict, depends: bool):
+        self.key_function = key_function
+        self.mapping = mapping
+        self.depends = depends
+        self.branches: Dict[Hashable, Union[_Decision, FrozenSet[RouteResult]]] = {}
+
+
+class RouteCache:
+    """Cache of routing decisions keyed by the values of consulted key functions
+
+    A pass records which key functions it consulted and their values, a later
+    event replays those key functions and reuses the terminals when values match.
+    Routing must only depend on key functions for this to hold. Passes raising
+    route exceptions are not cached, and the whole cache is dropped beyond maxsize.
+    """
+    _branches: Dict[Hashable, Union[_Decision, FrozenSet[RouteResult]]]
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._branches = {}
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def route(self, graph: Graph, state: RouteState) -> Set[RouteResult_T]:
+        results = await self._lookup(state)
+        if results is not None:
+            self.hits += 1
+            return set(results)
+
+        self.misses += 1
+        trace = state.store.trace = RouteTrace()
+        try:
+            routed = await graph.route(state)
+        finally:
+            state.store.trace = None
+        if trace.valid and not any(isinstance(r, RouteException) for r in routed):
+            self._insert(trace.entries, routed)
+        return routed
+
+    async def _lookup(self, state: RouteState) -> Optional[FrozenSet[RouteResult]]:
+        node = self._branches.get(_root)
+        while isinstance(node, _Decision):
+            state.keystack.append(dict(node.mapping))
+            try:
+                value = await state.store(node.key_function, state)
+                node = node.branches.get(value if node.depends else _any)
+            except Exception:
+                # Leave the failure to the routing pass
+                return None
+            finally:
+                state.keystack.pop()
+        return node
+
+    def _insert(self, entries: List[list], routed: Set[RouteResult_T]):
+        if self._size >= self.maxsize:
+            self.clear()
+        branches, branch = self._branches, _root
+        try:
+            for key_function, mapping, depends, value in entries:
+                node = branches.get(branch)
+                if node is None:
+                    node = branches[branch] = _Decision(key_function, mapping, depends)
+                elif not isinstance(node, _Decision) or \
+                        node.key_function != key_function or node.depends != depends:
+                    # Routing did not follow an earlier pass with equal values
+                    return
+                branches, branch = node.branches, value if depends else _any
+            if branch not in branches:
+                branches[branch] = frozenset(routed)
+                self._size += 1
+        except TypeError:
+            # Unhashable key values cannot be cached
+            return
+
+    def clear(self):
+        self._branches.clear()
+        self._size = 0
+
+    @property
+    def stats(self) -> dict:
+        return {'size': self._size, 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return self._size
@@ -0,0 +1,128 @@
+import sys
+import time
+from collections import OrderedDict
+
+from ajenga.typing import TYPE_CHECKING, Dict, Hashable, Optional
+
+from .keyfunc import KeyFunction, KeyFunction_T, KeyFunctionImpl
+
+if TYPE_CHECKING:
+    from .models.execution import Task
+
+
+class SessionRegistry:
+    """Paused tasks of an engine, bounded in idle time and number
+
+    Tasks are registered while paused. Those idle for more than idle_timeout
+    seconds, and the least recently paused ones beyond maxsize, are cancelled.
+
+    Tasks pausing with a session key are indexed by it. Given a key function
+    computing the session key of events, the engine resumes the matching task
+    directly with each event instead of routing it to wakeup predicates.
+    """
+    _tasks: "OrderedDict[Task, None]"
+    _index: "Dict[Hashable, Task]"
+
+    def __init__(self,
+                 maxsize: int = 10000,
+                 idle_timeout: Optional[float] = None,
+                 key: Optional[KeyFunction_T] = None,
+                 ):
+        """
+        :param key: Key function of the session key of an event, None if it has no session
+        """
+        if maxsize <= 0:
+            raise ValueError('Session registry size must be positive!')
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.key_function = key if key is None or isinstance(key, KeyFunction) else KeyFunctionImpl(key)
+        self._tasks = OrderedDict()
+        self._index = {}
+        self.expirations = 0
+        self.evictions = 0
+
+    def add(self, task: "Task") -> None:
+        """Register a task just paused"""
+        self._tasks[task] = None
+        self._tasks.move_to_end(task)
+        if task.session_key is not None:
+            self._index[task.session_key] = task
+        self.expire()
+        while len(self._tasks) > self.maxsize:
+            self._evict(next(iter(self._tasks)))
+            self.evictions += 1
+
+    def discard(self, task: "Task") -> None:
+        """Unregister a task resumed or cancelled"""
+        self._tasks.pop(task, None)
+        if task.session_key is not None and self._index.get(task.session_key) is task:
+            del self._index[task.session_key]
+
+    def restore(self, task: "Task") -> None:
+        """Index again a task claimed but not resumed"""
+        if task.paused and task in self._tasks and task.session_key is not None:
+            self._index.setdefault(task.session_key, task)
+
+    def get(self, session_key: Hashable) -> "Optional[Task]":
+        return self._index.get(session_key)
+
+    def take(self, session_key: Hashable) -> "Optional[Task]":
+        """Claim the paused task of a session to resume it, so that it is matched once"""
+        task = self._index.pop(session_key, None)
+        return task if task is not None and task.paused else None
+
+    def expire(self) -> int:
+        """Cancel tasks idle for more than idle_timeout
+
+        :return: Number of tasks cancelled
+        """
+        if self.idle_timeout is None:
+            return 0
+        count = 0
+        threshold = time.monotonic() - self.idle_timeout
+        # Ordered by pause time, stop at the first task still fresh
+        while self._tasks:
+            task = next(iter(self._tasks))
+            if task.paused_at > threshold:
+                break
+            self._evict(task)
+            count += 1
+        self.expirations += count
+        return count
+
+    def _evict(self, task: "Task") -> None:
+        self.discard(task)
+        task.cancel()
+
+    def clear(self) -> None:
+        """Cancel all paused tasks"""
+        while self._tasks:
+            self._evict(next(iter(self._tasks)))
+
+    def footprint(self) -> int:
+        """Approximate bytes held by paused tasks, their arguments and states
+
+        Walks every paused task, thus left out of stats.
+        """
+        size = 0
+        for task in self._tasks:
+            size += sys.getsizeof(task) + sys.getsizeof(task.args) + sys.getsizeof(task.kwargs)
+            size += sum(map(sys.getsizeof, task.args))
+            size += sum(map(sys.getsizeof, task.kwargs.values()))
+            if task._state is not None:
+                size += sys.getsizeof(task._state)
+        return size
+
+    @property
+    def stats(self) -> dict:
+        return {'paused': len(self._tasks), 'indexed': len(self._index), 'expirations': self.expirations,
+                'evictions': self.evictions}
+
+    def __contains__(self, task: "Task") -> bool:
+        return task in self._tasks
+
+    def __iter__(self):
+        return iter(self._tasks)
+
+    def __len__(self):
+        return len(self._tasks)
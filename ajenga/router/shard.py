@@ -0,0 +1,253 @@
+import asyncio
+import contextlib
+import importlib
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+
+from ajenga.typing import (Any, AsyncIterable, Callable, Dict, Hashable, List,
+                           Optional, Tuple)
+
+from .utils import aclosing
+
+# Messages of a worker, as (request id, pickled (kind, value))
+_RESULT = 'result'
+_DONE = 'done'
+_RAISE = 'raise'
+
+
+def load_engine(setup: str):
+    """Build the engine of a registration given as 'module:attribute'
+
+    The attribute is an Engine, or a function returning one
+    """
+    module_name, _, attr = setup.partition(':')
+    obj = getattr(importlib.import_module(module_name), attr or 'engine')
+    return obj if hasattr(obj, 'forward') else obj()
+
+
+class ShardedEngine:
+    """Engines of the same graph in worker processes, with events partitioned by shard key
+
+    Events of the same shard key always go to the same worker, so paused tasks
+    of a session are resumed there. Events, keyword arguments and results are
+    pickled between processes, by a writer and a reader thread per worker so
+    that the loop never blocks on a full pipe.
+    """
+    _pending: Dict[int, Tuple[int, asyncio.Queue]]
+
+    def __init__(self,
+                 setup: str,
+                 shards: Optional[int] = None,
+                 shard_key: Optional[Callable[..., Hashable]] = None,
+                 start_method: str = 'spawn',
+                 ):
+        """
+        :param setup: Registration building the engine in each worker, as 'module:attribute'
+        :param shards: Number of worker processes, the number of CPUs by default
+        :param shard_key: Function of the event arguments, events are distributed round robin if None
+        """
+        self.setup = setup
+        self.shards = shards or os.cpu_count() or 1
+        self.shard_key = shard_key
+        self._context = multiprocessing.get_context(start_method)
+        self._processes: List[multiprocessing.Process] = []
+        self._outboxes: List[queue.SimpleQueue] = []
+        self._writers: List[threading.Thread] = []
+        self._readers: List[threading.Thread] = []
+        self._pending = {}
+        self._counter = itertools.count()
+        self._round_robin = itertools.cycle(range(self.shards))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def started(self) -> bool:
+        return bool(self._processes)
+
+    def start(self):
+        """Start the workers, called on first forward
+
+        Must be called from the running loop, which receives the results.
+        """
+        self._loop = asyncio.get_running_loop()
+        for index in range(self.shards):
+            event_recv, event_send = self._context.Pipe(duplex=False)
+            result_recv, result_send = self._context.Pipe(duplex=False)
+            process = self._context.Process(target=_serve, args=(self.setup, event_recv, result_send),
+                                            name=f'ajenga-router-shard-{index}', daemon=True)
+            process.start()
+            event_recv.close()
+            result_send.close()
+            outbox = queue.SimpleQueue()
+            writer = threading.Thread(target=self._write, args=(outbox, event_send), daemon=True)
+            writer.start()
+            reader = threading.Thread(target=self._read, args=(index, result_recv), daemon=True)
+            reader.start()
+            self._processes.append(process)
+            self._outboxes.append(outbox)
+            self._writers.append(writer)
+            self._readers.append(reader)
+
+    def shard_of(self, args: Tuple, kwargs: dict) -> int:
+        if self.shard_key is None:
+            return next(self._round_robin)
+        return hash(self.shard_key(*args, **kwargs)) % self.shards
+
+    async def forward(self, *args, **kwargs) -> AsyncIterable:
+        """Forward an event on the worker of its shard
+
+        :return: AsyncIterator of results streamed back from the worker
+        """
+        if not self.started:
+            self.start()
+        request = next(self._counter)
+        shard = self.shard_of(args, kwargs)
+        results = asyncio.Queue()
+        self._pending[request] = (shard, results)
+        try:
+            self._outboxes[shard].put((request, args, kwargs))
+            while True:
+                kind, value = await results.get()
+                if kind == _DONE:
+                    return
+                elif kind == _RAISE:
+                    raise value
+                yield value
+        finally:
+            del self._pending[request]
+
+    def _write(self, outbox: queue.SimpleQueue, conn):
+        while True:
+            event = outbox.get()
+            if event is None:
+                with contextlib.suppress(OSError):
+                    conn.send(None)
+                conn.close()
+                return
+            try:
+                conn.send(event)
+            except Exception as e:
+                # Event failing to pickle, or worker gone, only fails its own request
+                self._loop.call_soon_threadsafe(self._dispatch, [(event[0], (_RAISE, e))])
+
+    def _read(self, shard: int, conn):
+        while True:
+            try:
+                messages = conn.recv()
+            except EOFError:
+                self._loop.call_soon_threadsafe(self._abort, shard)
+                return
+            self._loop.call_soon_threadsafe(self._dispatch, [(request, _loads(request, payload))
+                                                             for request, payload in messages])
+
+    def _dispatch(self, messages: List[Tuple[int, Tuple[str, Any]]]):
+        for request, message in messages:
+            pending = self._pending.get(request)
+            if pending is not None:
+                pending[1].put_nowait(message)
+
+    def _abort(self, shard: int):
+        for _shard, results in self._pending.values():
+            if _shard == shard:
+                results.put_nowait((_RAISE, RuntimeError(f'Shard worker {shard} exited!')))
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers after the events sent to them are handled"""
+        for outbox in self._outboxes:
+            outbox.put(None)
+        if wait:
+            for writer in self._writers:
+                writer.join()
+            for process in self._processes:
+                process.join()
+            for reader in self._readers:
+                reader.join()
+        self._processes.clear()
+        self._outboxes.clear()
+        self._writers.clear()
+        self._readers.clear()
+
+
+def _serve(setup: str, event_conn, result_conn):
+    """Entry of a worker process, forwarding received events on its own engine"""
+    asyncio.run(_Worker(load_engine(setup), event_conn, result_conn).serve())
+
+
+class _Worker:
+
+    def __init__(self, engine, event_conn, result_conn):
+        self.engine = engine
+        self.event_conn = event_conn
+        self.result_conn = result_conn
+        self._outbox: List[Tuple[int, str, Any]] = []
+        self._flush_handle = None
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        # Events are read in a thread, as the connection blocks
+        events = asyncio.Queue()
+        reader = threading.Thread(target=self._read, args=(loop, events), daemon=True)
+        reader.start()
+        tasks = set()
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            task = asyncio.ensure_future(self._forward(*event))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        self._flush()
+        self.result_conn.close()
+        self.engine.shutdown()
+
+    def _read(self, loop, events: asyncio.Queue):
+        while True:
+            try:
+                event = self.event_conn.recv()
+            except EOFError:
+                event = None
+            loop.call_soon_threadsafe(events.put_nowait, event)
+            if event is None:
+                return
+
+    async def _forward(self, request: int, args: Tuple, kwargs: dict):
+        try:
+            async with aclosing(self.engine.forward(*args, **kwargs)) as stream:
+                async for res in stream:
+                    self._send(request, _RESULT, res)
+        except Exception as e:
+            self._send(request, _RAISE, e)
+        else:
+            self._send(request, _DONE, None)
+
+    def _send(self, request: int, kind: str, value: Any):
+        # Messages are sent in batches, once per loop iteration
+        self._outbox.append((request, kind, value))
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        if self._outbox:
+            outbox, self._outbox = self._outbox, []
+            # Pickled one by one, so that a message failing only fails its own request
+            self.result_conn.send([(request, _dumps(request, kind, value)) for request, kind, value in outbox])
+
+
+def _dumps(request: int, kind: str, value: Any) -> bytes:
+    try:
+        return pickle.dumps((kind, value))
+    except Exception as e:
+        return pickle.dumps((_RAISE, RuntimeError(f'Cannot send {kind} of request {request}: {e!r}')))
+
+
+def _loads(request: int, payload: bytes) -> Tuple[str, Any]:
+    try:
+        return pickle.loads(payload)
+    except Exception as e:
+        return _RAISE, RuntimeError(f'Cannot receive message of request {request}: {e!r}')
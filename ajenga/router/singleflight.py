@@ -0,0 +1,41 @@
+import asyncio
+
+from ajenga.typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """Coalesce concurrent evaluations sharing a key into one in-flight future
+
+    Unlike a cache, nothing is kept once the evaluation completes.
+    """
+    _flights: Dict[Hashable, asyncio.Future]
+
+    def __init__(self):
+        self._flights = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        future = self._flights.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(func())
+            self._flights[key] = future
+            future.add_done_callback(lambda _future: self._done(key, _future))
+        else:
+            self.shared += 1
+        # Cancelling one waiter must not cancel the evaluation for others
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: asyncio.Future):
+        if self._flights.get(key) is future:
+            del self._flights[key]
+
+    @property
+    def stats(self) -> dict:
+        return {'in_flight': len(self._flights), 'calls': self.calls, 'shared': self.shared}
+
+    def __len__(self):
+        return len(self._flights)
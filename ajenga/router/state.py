@@ -1,5 +1,6 @@
+from collections import Counter
 from dataclasses import dataclass, field
-from typing import Any, Tuple, List, Dict, TYPE_CHECKING
+from typing import Any, Callable, Tuple, List, Dict, Iterable, Optional, Set, TYPE_CHECKING
 from .keystore import KeyStore
 
 if TYPE_CHECKING:
@@ -11,7 +12,9 @@ class RouteState:
     args: Tuple
     store: KeyStore
     keystack: List[Dict] = field(default_factory=list)
-
+    tracker: "Optional[RouteTracker]" = None
+    # Monotonic time after which handlers of the event are dropped
+    deadline: Optional[float] = None
 
     def __enter__(self):
         self.keystack.append({})
@@ -44,3 +47,76 @@ class RouteResult:
     def __eq__(self, o: object) -> bool:
         return isinstance(o, RouteResult) and self.node == o.node
 
+
+class RouteTracker:
+    """Follow a routing pass to stream terminals out as soon as they are found
+
+    Keeps the highest priority of terminals still reachable from the nodes
+    being routed, so that lower priority terminals already found can start.
+    """
+    _pending: Counter
+
+    def __init__(self,
+                 priorities: Dict[int, int],
+                 on_found: Callable[[RouteResult], Any],
+                 on_bound: Callable[[int], Any],
+                 root: Any = None,
+                 ):
+        """
+        :param priorities: Max priority of terminals reachable from each nonterminal, by node id
+        :param on_found: Called once for each terminal found
+        :param on_bound: Called with the max priority of terminals routing may still find,
+                         None once nothing is left to route
+        :param root: Node routing starts from, left as soon as its successors are entered
+        """
+        self._priorities = priorities
+        self.root = root
+        self._on_found = on_found
+        self._on_bound = on_bound
+        self._pending = Counter()
+        self._found: Set[RouteResult] = set()
+        self.bound = None
+
+    def enter(self, nodes: Iterable[Any], source: Any = None):
+        """
+        :param source: Node the nodes are entered from, the root is left then as
+                       nothing else is routed from it, other nodes once routed
+        """
+        for node in nodes:
+            priority = self._priorities.get(id(node))
+            if priority is not None:
+                self._pending[priority] += 1
+        if source is not None and source is self.root:
+            self.root = None
+            self.leave(source)
+        self._update()
+
+    def order(self, nodes: Iterable[Any]) -> Tuple:
+        """Order nodes to route, terminals first then by max priority reachable
+
+        So that higher tiers are found, and lower tiers released, as early as possible
+        """
+        return tuple(sorted(nodes, key=lambda node: -self._priorities.get(id(node), _terminal)))
+
+    def leave(self, node: Any):
+        priority = self._priorities.get(id(node))
+        if priority is not None:
+            self._pending[priority] -= 1
+            if not self._pending[priority]:
+                del self._pending[priority]
+            self._update()
+
+    def found(self, routed: RouteResult):
+        if routed not in self._found:
+            self._found.add(routed)
+            self._on_found(routed)
+
+    def _update(self):
+        bound = max(self._pending, default=None)
+        if bound != self.bound:
+            self.bound = bound
+            self._on_bound(bound)
+
+
+# Sorts terminals, which have no reachable priority, before nonterminals
+_terminal = float('inf')
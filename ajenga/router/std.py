@@ -3,18 +3,23 @@ from functools import partial
 from typing import Optional
 
 from ajenga.typing import (Any, AsyncIterable, Awaitable, Callable, Dict,
-                           Hashable, Iterable, Set, Tuple, Type, final)
+                           Hashable, Iterable, List, Set, Tuple, Type, final)
 
 from .exceptions import RouteException, RouteInternalException
 from .keyfunc import (KeyFunction, KeyFunction_T, KeyFunctionImpl,
                       PredicateFunction_T, first_argument)
 from .keystore import KeyStore
+from .limit import DELAY, Throttle
 from .models import (AbsNode, Graph, IdentityNode, Node, NonterminalNode,
                      RouteResult_T, TerminalNode)
 from .state import RouteState
 from .utils import wrap_function
 
 
+def _route_exception(e: BaseException) -> RouteException:
+    return e if isinstance(e, RouteException) else RouteInternalException(e)
+
+
 class RawHandlerNode(TerminalNode, AbsNode):
     args: Tuple
     kwargs: Dict
@@ -51,8 +56,24 @@ class HandlerNode(RawHandlerNode):
     args: Tuple
     kwargs: Dict
 
-    def __init__(self, func: Callable, *args, **kwargs):
-        super().__init__(wrap_function(func), *args, **kwargs)
+    def __init__(self, func: Callable, *args,
+                 offload: Optional[str] = None,
+                 max_concurrency: Optional[int] = None,
+                 rate: Optional[float] = None,
+                 burst: Optional[int] = None,
+                 throttle_policy: str = DELAY,
+                 throttle: Optional[Throttle] = None,
+                 **kwargs):
+        """
+        :param offload: Run a sync handler in the engine's 'thread' or 'process' pool
+        :param max_concurrency: Max tasks of the handler running at once across events
+        :param rate: Max tasks of the handler started per second, in bursts of up to burst
+        :param throttle_policy: 'delay' or 'drop' tasks over the limits
+        :param throttle: Throttle to share, instead of the above
+        """
+        if throttle is None and (max_concurrency is not None or rate is not None):
+            throttle = Throttle(max_concurrency, rate, burst, throttle_policy)
+        super().__init__(wrap_function(func, offload=offload), *args, offload=offload, throttle=throttle, **kwargs)
         self._original_func = func
 
     def copy(self, node_map: Dict[Node, Node] = ...) -> "HandlerNode":
@@ -173,6 +194,10 @@ class PredicateNode(AbsNonterminalNode):
             else:
                 self.add_key(KeyFunctionImpl(predicate))
 
+    @property
+    def key_functions(self) -> Iterable[KeyFunction]:
+        return tuple(self._successors)
+
     async def _route(self, state: RouteState) -> Set[RouteResult_T]:
         res = set()
         for predicate, nodes in self._successors.items():
@@ -185,13 +210,23 @@ class PredicateNode(AbsNonterminalNode):
                 res.add(RouteInternalException(e))
                 continue
             if pred_res:
-                for node in nodes:
-                    if isinstance(node, TerminalNode):
-                        res.add(state.wrap(node))
-                    elif isinstance(node, NonterminalNode):
-                        res |= await node.route(state)
+                res |= await self._route_successors(state, nodes)
         return res
 
+    async def _route_many(self, states: List[RouteState]) -> List[Set[RouteResult_T]]:
+        results = [set() for _ in states]
+        for predicate, nodes in self._successors.items():
+            matched_states, matched_results = [], []
+            for state, res, pred_res in zip(states, results, await KeyStore.gather(predicate, states)):
+                if isinstance(pred_res, BaseException):
+                    res.add(_route_exception(pred_res))
+                elif pred_res:
+                    matched_states.append(state)
+                    matched_results.append(res)
+            await self._route_successors_many(matched_states, matched_results, nodes)
+        return results
+
+
 class EqualNode(AbsNonterminalNode):
     def __init__(self, *values, key: KeyFunction_T = first_argument, key_id=None):
         super().__init__()
@@ -209,6 +244,10 @@ class EqualNode(AbsNonterminalNode):
     def new(self) -> "EqualNode":
         return EqualNode(key=self._key)
 
+    @property
+    def key_functions(self) -> Iterable[KeyFunction]:
+        return self._key,
+
     async def _route(self, state: RouteState) -> Set[RouteResult_T]:
         res = set()
         try:
@@ -224,12 +263,27 @@ class EqualNode(AbsNonterminalNode):
         if key not in self._successors:
             return res
 
-        for node in self._successors[key]:
-            if isinstance(node, TerminalNode):
-                res.add(state.wrap(node))
-            elif isinstance(node, NonterminalNode):
-                res |= await node.route(state)
-        return res
+        return await self._route_successors(state, self._successors[key])
+
+    async def _route_many(self, states: List[RouteState]) -> List[Set[RouteResult_T]]:
+        results = [set() for _ in states]
+        groups: Dict[Hashable, Tuple[List[RouteState], List[Set[RouteResult_T]]]] = {}
+        for state, res, key in zip(states, results, await KeyStore.gather(self._key, states)):
+            if isinstance(key, BaseException):
+                res.add(_route_exception(key))
+                continue
+
+            if not isinstance(key, Hashable):
+                raise ValueError(f'Key {key} to EqualNode must be Hashable!')
+
+            if key in self._successors:
+                group_states, group_results = groups.setdefault(key, ([], []))
+                group_states.append(state)
+                group_results.append(res)
+
+        for key, (group_states, group_results) in groups.items():
+            await self._route_successors_many(group_states, group_results, self._successors[key])
+        return results
 
 
 @final
@@ -242,22 +296,31 @@ class ProcessorNode(AbsNonterminalNode):
             else:
                 self.add_key(KeyFunctionImpl(processor))
 
+    @property
+    def key_functions(self) -> Iterable[KeyFunction]:
+        return tuple(self._successors)
+
     async def _route(self, state: RouteState) -> Set[RouteResult_T]:
         res = set()
         for processor, nodes in self._successors.items():
             try:
-                await state.store(processor, state)
+                await state.store(processor, state, depends=False)
             except RouteException as e:
                 res.add(e)
             except Exception as e:
                 res.add(RouteInternalException(e))
-            for node in nodes:
-                if isinstance(node, TerminalNode):
-                    res.add(state.wrap(node))
-                elif isinstance(node, NonterminalNode):
-                    res |= await node.route(state)
+            res |= await self._route_successors(state, nodes)
         return res
 
+    async def _route_many(self, states: List[RouteState]) -> List[Set[RouteResult_T]]:
+        results = [set() for _ in states]
+        for processor, nodes in self._successors.items():
+            for res, processed in zip(results, await KeyStore.gather(processor, states)):
+                if isinstance(processed, BaseException):
+                    res.add(_route_exception(processed))
+            await self._route_successors_many(states, results, nodes)
+        return results
+
 
 def make_graph_deco(node_cls: Type[NonterminalNode]) -> Callable[..., Graph]:
     def deco(*args, **kwargs):
@@ -1,13 +1,13 @@
 import pygtrie
 from ajenga.typing import (AsyncIterable, Callable, Dict, Hashable, Iterable,
-                           Set, Union, final)
+                           List, Set, Tuple, Union, final)
 
 from .exceptions import RouteException, RouteInternalException
 from .keyfunc import KeyFunction, KeyFunctionImpl
 from .keystore import KeyStore
-from .models import AbsNode, Node, NonterminalNode, RouteResult_T, TerminalNode
+from .models import AbsNode, Node, NonterminalNode, RouteResult_T
 from .state import RouteState
-from .std import first_argument
+from .std import _route_exception, first_argument
 
 
 class AbsTrieNonterminalNode(NonterminalNode, AbsNode):
@@ -134,16 +134,36 @@ class PrefixNode(AbsTrieNonterminalNode):
 
         # pair = self._successors.longest_prefix(key)
         for pair in self._successors.prefixes(key):
-            for node in pair.value:
-                if isinstance(node, TerminalNode):
-                    res.add(state.wrap(node))
-                elif isinstance(node, NonterminalNode):
-                    res |= await node.route(state)
+            res |= await self._route_successors(state, pair.value)
         return res
 
+    async def _route_many(self, states: List[RouteState]) -> List[Set[RouteResult_T]]:
+        results = [set() for _ in states]
+        groups: Dict[str, Tuple[Set[Node], List[RouteState], List[Set[RouteResult_T]]]] = {}
+        for state, res, key in zip(states, results, await KeyStore.gather(self._key, states)):
+            if isinstance(key, BaseException):
+                res.add(_route_exception(key))
+                continue
+
+            if not isinstance(key, str):
+                raise ValueError(f'Key {key} to PrefixNode must be str!')
+
+            for pair in self._successors.prefixes(key):
+                _, group_states, group_results = groups.setdefault(pair.key, (pair.value, [], []))
+                group_states.append(state)
+                group_results.append(res)
+
+        for nodes, group_states, group_results in groups.values():
+            await self._route_successors_many(group_states, group_results, nodes)
+        return results
+
     def new(self) -> "PrefixNode":
         return PrefixNode(key=self._key)
 
     @property
     def __id__(self) -> Hashable:
         return super(PrefixNode, self).__id__, self._key.__id__
+
+    @property
+    def key_functions(self) -> Iterable[KeyFunction]:
+        return self._key,
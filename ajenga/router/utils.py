@@ -5,7 +5,8 @@ import warnings
 from functools import wraps
 
 from ajenga.typing import (TYPE_CHECKING, Any, AsyncIterable, Awaitable,
-                           Callable, Collection, Coroutine, Dict, List, Union)
+                           Callable, Collection, Coroutine, Dict, List,
+                           Optional, Union)
 
 if TYPE_CHECKING:
     from .state import RouteState
@@ -19,9 +20,14 @@ class Alias:
         self.name = name
 
 
-def wrap_function(func: Callable[..., Union[Awaitable[T], T]]) -> Callable[..., Awaitable[T]]:
+def wrap_function(func: Callable[..., Union[Awaitable[T], T]],
+                  offload: Optional[str] = None) -> Callable[..., Awaitable[T]]:
     _func = func
     _async = asyncio.iscoroutinefunction(func)
+    _offload = offload
+
+    if _offload and _async:
+        raise TypeError("Cannot offload a coroutine function !")
 
     # Generate signature
     sig = inspect.signature(func)
@@ -68,6 +74,11 @@ def wrap_function(func: Callable[..., Union[Awaitable[T], T]]) -> Callable[...,
             else:
                 raise TypeError(f"Keyword Parameter {key} not found in context !")
 
+        if _offload:
+            if '_pools' not in state.store:
+                raise TypeError("Worker pools not found in context to offload !")
+            return await state.store['_pools'].run(_offload, _func, *state.args, **kwargs)
+
         return await _func(*state.args, **kwargs) if _async else _func(*state.args, **kwargs)
 
     return wrapper
@@ -81,6 +92,22 @@ def raise_(e: BaseException):
     raise e
 
 
+class aclosing:
+    """Close an async generator on exit, like contextlib.aclosing of Python 3.10
+
+    Generators left suspended are otherwise finalized later in another context.
+    """
+
+    def __init__(self, agen) -> None:
+        self._agen = agen
+
+    async def __aenter__(self):
+        return self._agen
+
+    async def __aexit__(self, *exc_info):
+        await self._agen.aclose()
+
+
 async def consume_async_iterator(ait: AsyncIterable[T],
                                  collection_factory: Callable[..., Collection[T]] = list,
                                  collect_function: Callable[[Collection[T], T], Any] = list.append
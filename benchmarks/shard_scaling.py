@@ -0,0 +1,62 @@
+"""Throughput of ShardedEngine with an increasing number of shards
+
+Handlers are CPU-bound, so throughput should grow close to linearly with
+shards up to the number of cores.
+
+    python benchmarks/shard_scaling.py [events] [max shards]
+"""
+import asyncio
+import os
+import sys
+import time
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.shard import ShardedEngine
+
+
+def setup() -> Engine:
+    engine = Engine()
+
+    @engine.on(std.true)
+    def work(n, group):
+        total = 0
+        for i in range(n):
+            total += i * i
+        return total
+
+    return engine
+
+
+async def run(shards: int, events: int, work: int) -> float:
+    engine = ShardedEngine(f'{__name__}:setup' if __name__ != '__main__' else 'shard_scaling:setup',
+                           shards=shards, shard_key=lambda n, group: group)
+    engine.start()
+
+    async def forward(group):
+        return [res async for res in engine.forward(work, group)]
+
+    # Warm up workers
+    await asyncio.gather(*(forward(group) for group in range(shards * 4)))
+    start = time.perf_counter()
+    await asyncio.gather(*(forward(group) for group in range(events)))
+    elapsed = time.perf_counter() - start
+    engine.shutdown()
+    return events / elapsed
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    max_shards = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    baseline = None
+    shards = 1
+    while shards <= max_shards:
+        throughput = asyncio.run(run(shards, events, 20000))
+        baseline = baseline or throughput
+        print(f'{shards:>3} shards: {throughput:>10.1f} events/s  x{throughput / baseline:.2f}')
+        shards *= 2
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from ajenga.router import std
+from ajenga.router.admission import DROP_LOWEST, DROP_OLDEST, AdmissionControl
+from ajenga.router.engine import Engine
+from ajenga.router.exceptions import AdmissionRejectedException
+from ajenga.router.utils import aclosing
+
+
+def _acquire_all(admission, priorities):
+    async def acquire(priority):
+        try:
+            await admission.acquire(priority)
+        except AdmissionRejectedException:
+            return 'rejected'
+        return priority
+
+    async def main():
+        await admission.acquire()
+        waiters = [asyncio.ensure_future(acquire(priority)) for priority in priorities]
+        await asyncio.sleep(0)
+        admitted = []
+        while admission.inflight:
+            admission.release()
+            await asyncio.sleep(0)
+        for waiter in waiters:
+            admitted.append(await waiter)
+        return admitted
+
+    return asyncio.run(main())
+
+
+def test_queue_admits_by_priority():
+    admission = AdmissionControl(max_inflight=1, max_queue=3)
+    assert _acquire_all(admission, [1, 3, 2, 4]) == [1, 3, 2, 'rejected']
+    assert admission.stats['rejected'] == 1
+
+
+@pytest.mark.parametrize('policy, expected', [
+    (DROP_LOWEST, [2, 'rejected', 3]),
+    (DROP_OLDEST, ['rejected', 1, 3]),
+])
+def test_drop_policies(policy, expected):
+    admission = AdmissionControl(max_inflight=1, max_queue=2, policy=policy)
+    assert _acquire_all(admission, [2, 1, 3]) == expected
+    assert admission.dropped == 1
+
+
+def test_slot_released_when_consumer_closes_early():
+    admission = AdmissionControl(max_inflight=1, max_queue=0)
+    engine = Engine(admission=admission)
+
+    @engine.on(std.true)
+    def handler(x):
+        return x
+
+    engine.on(std.true)(std.HandlerNode(lambda x: x))
+
+    async def main():
+        async with aclosing(engine.forward(1)) as results:
+            async for _ in results:
+                break
+        assert admission.inflight == 0
+        return [res async for res in engine.forward(2)]
+
+    assert asyncio.run(main()) == [2, 2]
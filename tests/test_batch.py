@@ -0,0 +1,87 @@
+import asyncio
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.keyfunc import BatchKeyFunction
+
+
+def test_forward_many_indexes_results():
+    engine = Engine()
+
+    @engine.on(std.if_(lambda x: x > 1))
+    def big(x):
+        return 'big', x
+
+    @engine.on(std.true)
+    def echo(x):
+        return 'echo', x
+
+    async def main():
+        return [res async for res in engine.forward_many([(1,), (2,), (3,)])]
+
+    results = sorted(asyncio.run(main()))
+    assert results == [(0, ('echo', 1)),
+                       (1, ('big', 2)), (1, ('echo', 2)),
+                       (2, ('big', 3)), (2, ('echo', 3))]
+
+
+def test_forward_many_route_timeout():
+    engine = Engine()
+
+    async def slow(x):
+        await asyncio.sleep(0.2)
+        return True
+
+    @engine.on(std.if_(slow))
+    def handler(x):
+        return x
+
+    async def main():
+        return [res async for res in engine.forward_many([(1,), (2,)], _route_timeout=0.05)]
+
+    results = asyncio.run(main())
+    assert sorted(index for index, _ in results) == [0, 1]
+    assert all(isinstance(res, asyncio.TimeoutError) for _, res in results)
+
+
+def test_batch_key_function_binds_each_event():
+    calls = []
+
+    def parity(events):
+        calls.append(list(events))
+        return [event % 2 for event in events]
+
+    engine = Engine()
+    key = BatchKeyFunction(parity)
+
+    @engine.on(std.equals(0, key=key))
+    def even(*args):
+        return 'even'
+
+    async def main():
+        return [res async for res in engine.forward_many([(1,), (), (2,)])]
+
+    results = sorted(asyncio.run(main()), key=lambda res: res[0])
+    assert calls == [[1, 2]]
+    assert len(results) == 2
+    assert results[0][0] == 1 and isinstance(results[0][1], TypeError)
+    assert results[1] == (2, 'even')
+
+
+def test_batch_key_function_timeout():
+    async def slow(events):
+        await asyncio.sleep(0.2)
+        return events
+
+    engine = Engine()
+
+    @engine.on(std.equals(1, key=BatchKeyFunction(slow, timeout=0.05)))
+    def handler(x):
+        return x
+
+    async def main():
+        return [res async for res in engine.forward_many([(1,), (1,)])]
+
+    results = asyncio.run(main())
+    assert [index for index, _ in sorted(results, key=lambda res: res[0])] == [0, 1]
+    assert all(isinstance(res, asyncio.TimeoutError) for _, res in results)
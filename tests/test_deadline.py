@@ -0,0 +1,65 @@
+import asyncio
+from functools import partial
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.models import Priority, Task
+from ajenga.router.models.execution import (DeadlineExceededError,
+                                            EarliestDeadlineFirst,
+                                            PriorityExecutor)
+
+
+def test_earliest_deadline_first():
+    executor = PriorityExecutor(max_workers=1, policy=EarliestDeadlineFirst())
+
+    def handler(name):
+        async def fn():
+            return name
+        return fn
+
+    executor.add_task(Task(handler('none')))
+    executor.add_task(Task(handler('late'), deadline=2e9))
+    executor.add_task(Task(handler('early'), deadline=1e9))
+
+    async def main():
+        return [res async for res in executor.run()]
+
+    assert asyncio.run(main()) == ['early', 'late', 'none']
+
+
+def _slow_engine():
+    engine = Engine(executor_factory=partial(PriorityExecutor, max_workers=1))
+
+    async def slow(x):
+        await asyncio.sleep(0.1)
+        return 'slow'
+
+    engine.on(std.true)(std.HandlerNode(slow, priority=Priority.Pre))
+
+    @engine.on(std.true)
+    async def queued(x):
+        return 'queued'
+
+    return engine
+
+
+def test_start_timeout_drops_waiting_handlers():
+    engine = _slow_engine()
+
+    async def main():
+        return [res async for res in engine.forward(1, _start_timeout=0.05)]
+
+    results = asyncio.run(main())
+    assert 'slow' in results and 'queued' not in results
+    assert sum(isinstance(res, DeadlineExceededError) for res in results) == 1
+
+
+def test_forward_many_start_timeout():
+    engine = _slow_engine()
+
+    async def main():
+        return [res async for res in engine.forward_many([(1,)], _start_timeout=0.05)]
+
+    results = [res for _, res in asyncio.run(main())]
+    assert 'slow' in results and 'queued' not in results
+    assert sum(isinstance(res, DeadlineExceededError) for res in results) == 1
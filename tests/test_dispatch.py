@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+from ajenga.router import std
+from ajenga.router.dispatch import Dispatcher
+from ajenga.router.engine import Engine
+from ajenga.router.keyfunc import BatchKeyFunction
+from ajenga.router.offload import THREAD
+from ajenga.router.routecache import RouteCache
+
+
+def test_failing_sink_is_isolated():
+    engine = Engine()
+    received, errors = [], []
+
+    @engine.on(std.true)
+    def handler(x):
+        return x
+
+    @engine.add_sink
+    def failing(args, res):
+        raise RuntimeError(res)
+
+    @engine.add_sink
+    def collect(args, res):
+        received.append(res)
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        futures = [await engine.submit(x) for x in range(3)]
+        results = await asyncio.gather(*futures)
+        await engine.aclose()
+        return results
+
+    assert asyncio.run(main()) == [[0], [1], [2]]
+    assert sorted(received) == [0, 1, 2]
+    assert len(errors) == 3 and all(isinstance(error['exception'], RuntimeError) for error in errors)
+
+
+def _batches(**kwargs):
+    batches = []
+
+    def key(events):
+        batches.append(len(events))
+        return events
+
+    engine = Engine(dispatcher=Dispatcher(workers=1, batch_size=4), **kwargs)
+
+    @engine.on(std.equals(1, key=BatchKeyFunction(key)))
+    def handler(x):
+        return x
+
+    async def main():
+        futures = [await engine.submit(1) for _ in range(4)]
+        results = await asyncio.gather(*futures)
+        await engine.aclose()
+        return results
+
+    assert asyncio.run(main()) == [[1]] * 4
+    return batches
+
+
+def test_batches_plain_events():
+    assert _batches() == [4]
+
+
+def test_no_batches_bypassing_engine_features():
+    assert _batches(route_cache=RouteCache()) == [1, 1, 1, 1]
+    assert not Engine(route_cache=RouteCache()).batchable
+
+
+def test_close_without_draining_cancels_queued():
+    engine = Engine(dispatcher=Dispatcher(workers=1))
+
+    @engine.on(std.true)
+    async def handler(x):
+        await asyncio.sleep(0.05)
+        return x
+
+    async def main():
+        futures = [await engine.submit(x) for x in range(3)]
+        await asyncio.sleep(0)
+        await engine.aclose(drain=False)
+        return futures
+
+    futures = asyncio.run(main())
+    assert all(future.cancelled() for future in futures)
+
+
+def test_aclose_does_not_block_the_loop():
+    engine = Engine()
+    ticks = []
+
+    @engine.on(std.true)
+    @std.handler(offload=THREAD)
+    def blocking(x):
+        time.sleep(0.1)
+        return x
+
+    async def tick():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        forwarding = asyncio.ensure_future(engine.submit(1))
+        await asyncio.sleep(0.01)
+        ticking = asyncio.ensure_future(tick())
+        await engine.aclose()
+        ticking.cancel()
+        return await (await forwarding)
+
+    assert asyncio.run(main()) == [1]
+    assert len(ticks) >= 3
@@ -0,0 +1,145 @@
+import asyncio
+import sys
+from functools import partial
+
+import pytest
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.models import Executor, Priority, Task
+from ajenga.router.models.execution import PriorityExecutor, SimpleExecutor
+
+
+def _run(executor):
+    async def main():
+        return [res async for res in executor.run()]
+
+    return asyncio.run(main())
+
+
+def test_returned_raised_and_paused_outcomes():
+    executor = PriorityExecutor()
+
+    async def returns():
+        return 1
+
+    async def returns_exception():
+        return ValueError('returned')
+
+    async def raises():
+        raise KeyError('raised')
+
+    async def pauses():
+        await Task.current().pause()
+
+    for fn in (returns, returns_exception, raises, pauses):
+        executor.create_task(fn)
+
+    results = _run(executor)
+    assert len(results) == 3
+    assert 1 in results
+    assert any(isinstance(res, ValueError) for res in results)
+    assert any(isinstance(res, KeyError) for res in results)
+    assert executor.num_finished == 2
+
+
+def test_higher_priority_runs_first():
+    executor = PriorityExecutor()
+    order = []
+
+    def handler(name):
+        async def fn():
+            order.append(name)
+            return name
+        return fn
+
+    executor.create_task(handler('low'), priority=Priority.Post)
+    executor.create_task(handler('high'), priority=Priority.Pre)
+    executor.create_task(handler('default'))
+
+    assert _run(executor) == ['high', 'default', 'low']
+    assert order == ['high', 'default', 'low']
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='asyncio.timeout needs Python 3.11')
+@pytest.mark.parametrize('eager', [False, True])
+def test_handler_runs_in_its_own_task(eager):
+    engine = Engine(executor_factory=partial(PriorityExecutor, eager=eager))
+
+    @engine.on(std.true)
+    async def handler(x):
+        async with asyncio.timeout(0.01):
+            await asyncio.sleep(1)
+
+    @engine.on(std.true)
+    def sync(x):
+        return asyncio.current_task()
+
+    async def main():
+        return asyncio.current_task(), [res async for res in engine.forward(1)]
+
+    caller, results = asyncio.run(main())
+    assert len(results) == 2
+    assert any(isinstance(res, asyncio.TimeoutError) for res in results)
+    assert all(res is not caller for res in results)
+
+
+def test_stop_discards_lower_priority_work():
+    engine = Engine()
+    started = []
+
+    def stopper(x):
+        Executor.current().stop()
+        return 'stopped'
+
+    async def lower(x):
+        started.append(x)
+        return 'lower'
+
+    engine.on(std.true)(std.HandlerNode(stopper, priority=Priority.Pre))
+    engine.on(std.true)(std.HandlerNode(lower))
+
+    async def main():
+        return [res async for res in engine.forward(1)]
+
+    assert asyncio.run(main()) == ['stopped']
+    assert started == []
+
+
+@pytest.mark.parametrize('executor_factory', [PriorityExecutor, SimpleExecutor])
+def test_limit_cancels_remaining_handlers(executor_factory):
+    engine = Engine(executor_factory=executor_factory)
+    cancelled = []
+
+    @engine.on(std.true)
+    async def fast(x):
+        return 'fast'
+
+    async def slow(x):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(x)
+            raise
+        return 'slow'
+
+    for _ in range(2):
+        engine.on(std.true)(std.HandlerNode(slow))
+
+    async def main():
+        results = [res async for res in engine.forward(1, _limit=1)]
+        await asyncio.sleep(0)
+        return results
+
+    assert asyncio.run(main()) == ['fast']
+    assert cancelled == [1, 1]
+
+
+def test_limit_must_be_positive():
+    engine = Engine()
+
+    async def main():
+        return [res async for res in engine.forward(1, _limit=0)]
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
@@ -0,0 +1,50 @@
+import asyncio
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.keycache import KeyCache
+from ajenga.router.keyfunc import KeyFunctionImpl
+
+
+def test_evicts_least_recently_used():
+    cache = KeyCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats == {'size': 2, 'hits': 3, 'misses': 1, 'evictions': 1}
+
+
+def test_expires_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('ajenga.router.keycache.time.monotonic', lambda: now[0])
+    cache = KeyCache(ttl=10)
+    cache.put('a', 1)
+    now[0] += 9
+    assert cache.get('a') == 1
+    now[0] += 2
+    assert cache.get('a', 'missing') == 'missing'
+    assert len(cache) == 0
+
+
+def test_engine_shares_cached_keys_across_events():
+    calls = []
+
+    def key(x):
+        calls.append(x)
+        return x % 2
+
+    engine = Engine(key_cache=KeyCache())
+
+    @engine.on(std.equals(1, key=KeyFunctionImpl(key, cache_key=lambda x: x)))
+    def odd(x):
+        return x
+
+    async def main():
+        return [[res async for res in engine.forward(x)] for x in (1, 3, 1, 3)]
+
+    assert asyncio.run(main()) == [[1], [3], [1], [3]]
+    assert calls == [1, 3]
+    assert engine.key_cache.stats['hits'] == 2
@@ -0,0 +1,45 @@
+import asyncio
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.keyfunc import KeyFunctionImpl
+
+
+def test_key_timeout_counts_from_evaluation_start():
+    async def first(x):
+        await asyncio.sleep(0.1)
+        return True
+
+    async def second(x):
+        await asyncio.sleep(0.2)
+        return True
+
+    engine = Engine(prefetch=True)
+
+    @engine.on(std.if_(first) & std.if_(KeyFunctionImpl(second, timeout=0.15)))
+    def handler(x):
+        return x
+
+    async def main():
+        return [res async for res in engine.forward(1)]
+
+    results = asyncio.run(main())
+    assert len(results) == 1 and isinstance(results[0], asyncio.TimeoutError)
+
+
+def test_route_timeout_bounds_routing():
+    async def slow(x):
+        await asyncio.sleep(1)
+        return True
+
+    engine = Engine(route_timeout=0.05)
+
+    @engine.on(std.if_(slow))
+    def handler(x):
+        return x
+
+    async def main():
+        return [res async for res in engine.forward(1)]
+
+    results = asyncio.run(main())
+    assert len(results) == 1 and isinstance(results[0], asyncio.TimeoutError)
@@ -0,0 +1,45 @@
+import asyncio
+from functools import partial
+
+import pytest
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.limit import AdaptiveLimit
+from ajenga.router.models.execution import PriorityExecutor
+
+
+def test_limit_recovers_from_outlier_sample():
+    limit = AdaptiveLimit(initial=20, window=50)
+    limit.on_sample(0.00004, 20)
+    for _ in range(30):
+        limit.on_sample(0.01, 20)
+    assert limit.limit < 20
+    for _ in range(300):
+        limit.on_sample(0.01, 50)
+    assert limit.limit >= 20
+
+
+@pytest.mark.parametrize('eager', [False, True])
+def test_inline_handlers_are_not_sampled(eager):
+    limit = AdaptiveLimit(initial=20)
+    engine = Engine(executor_factory=partial(PriorityExecutor, max_workers=limit, eager=eager))
+
+    @engine.on(std.true)
+    def sync(x):
+        return x
+
+    async def sleep(x):
+        await asyncio.sleep(0.01)
+        return x
+
+    for _ in range(30):
+        engine.on(std.true)(std.HandlerNode(sleep))
+
+    async def main():
+        for _ in range(3):
+            assert len([res async for res in engine.forward(1)]) == 31
+
+    asyncio.run(main())
+    assert limit.samples == 90
+    assert limit.min_latency >= 0.01
@@ -0,0 +1,55 @@
+import concurrent.futures
+import threading
+
+import pytest
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+
+
+def test_threadsafe_entry_points():
+    engine = Engine(threaded=True)
+    loops = set()
+
+    @engine.on(std.true)
+    def handler(x):
+        loops.add(threading.current_thread().name)
+        return x
+
+    try:
+        forwarded = [engine.forward_threadsafe(x) for x in range(10)]
+        submitted = [engine.submit_threadsafe(x) for x in range(10, 20)]
+        results = [future.result(5) for future in forwarded + submitted]
+    finally:
+        engine.shutdown()
+    assert results == [[x] for x in range(20)]
+    assert loops == {'ajenga-router-loop'}
+    with pytest.raises(RuntimeError):
+        engine.forward_threadsafe(0)
+
+
+def test_registration_from_other_threads():
+    engine = Engine(threaded=True)
+    count = 8
+
+    def register(index):
+        @engine.on(std.true)
+        def handler(x):
+            return index
+
+        # Forwarded while other threads keep registering
+        return index, engine.forward_threadsafe(None).result(5)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(count) as pool:
+            for index, results in pool.map(register, range(count)):
+                assert index in results and len(set(results)) == len(results)
+        final = engine.forward_threadsafe(None).result(5)
+    finally:
+        engine.shutdown()
+    assert sorted(final) == list(range(count))
+
+
+def test_not_threaded():
+    with pytest.raises(RuntimeError):
+        Engine().forward_threadsafe(0)
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.models import Task
+from ajenga.router.offload import PROCESS, THREAD, WorkerPools
+
+
+def _pid(x):
+    return os.getpid()
+
+
+def test_thread_offload_keeps_the_loop_free():
+    engine = Engine()
+    ticks = []
+
+    @engine.on(std.true)
+    @std.handler(offload=THREAD)
+    def blocking(x):
+        time.sleep(0.1)
+        return threading.current_thread() is not threading.main_thread(), Task.current() is not None
+
+    async def tick():
+        for _ in range(5):
+            ticks.append(None)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        ticking = asyncio.ensure_future(tick())
+        results = [res async for res in engine.forward(1)]
+        # Ticked meanwhile
+        assert len(ticks) >= 3
+        await ticking
+        return results
+
+    assert asyncio.run(main()) == [(True, True)]
+    engine.shutdown()
+
+
+def test_process_offload():
+    engine = Engine(pools=WorkerPools(process_workers=1))
+    engine.on(std.true)(std.HandlerNode(_pid, offload=PROCESS))
+
+    async def main():
+        return [res async for res in engine.forward(1)]
+
+    results = asyncio.run(main())
+    engine.shutdown()
+    assert len(results) == 1 and results[0] != os.getpid()
+
+
+def test_coroutine_cannot_be_offloaded():
+    async def handler(x):
+        return x
+
+    with pytest.raises(TypeError):
+        std.HandlerNode(handler, offload=THREAD)
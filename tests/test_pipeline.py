@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.models import Priority
+
+
+def test_lower_tier_starts_before_slow_unrelated_branch():
+    engine = Engine(pipeline=True)
+    started = {}
+
+    def handler(name):
+        async def fn(x):
+            started[name] = time.monotonic()
+            return name
+        return fn
+
+    async def slow(x):
+        await asyncio.sleep(0.3)
+        return True
+
+    engine.on(std.true)(std.HandlerNode(handler('pre'), priority=Priority.Pre))
+    engine.on(std.true)(std.HandlerNode(handler('default')))
+    engine.on(std.if_(slow))(std.HandlerNode(handler('post'), priority=Priority.Post))
+
+    async def main():
+        begin = time.monotonic()
+        results = [res async for res in engine.forward(1)]
+        return begin, results
+
+    begin, results = asyncio.run(main())
+    assert sorted(results) == ['default', 'post', 'pre']
+    assert started['default'] - begin < 0.1
+    assert started['post'] - begin >= 0.3
+    assert started['pre'] <= started['default']
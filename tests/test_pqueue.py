@@ -0,0 +1,69 @@
+import pytest
+
+from ajenga.router.pqueue import PriorityQueue, PriorityQueueEntry
+
+
+class Item:
+    def __init__(self, key):
+        self.key = key
+
+
+def _drain(queue):
+    return [queue.pop().key for _ in range(len(queue))]
+
+
+def test_pops_by_key_then_insertion_order():
+    queue = PriorityQueue(lambda item: item.key)
+    items = [Item(key) for key in (3, 1, 2, 1)]
+    queue.extend(items)
+    assert queue.top() is items[1]
+    assert [queue.pop() for _ in range(4)] == [items[1], items[3], items[2], items[0]]
+    assert not queue
+    with pytest.raises(IndexError):
+        queue.pop()
+
+
+def test_remove_and_update():
+    queue = PriorityQueue(lambda item: item.key)
+    items = [Item(key) for key in range(10)]
+    for item in items:
+        queue.push(item)
+    queue.remove(items[0])
+    assert not queue.discard(items[0])
+    assert items[0] not in queue and len(queue) == 9
+    items[9].key = -1
+    queue.update(items[9])
+    assert queue.top_key() == -1
+    for item in items[1:6]:
+        queue.remove(item)
+    assert _drain(queue) == [-1, 6, 7, 8]
+
+
+def test_push_of_queued_item_raises():
+    queue = PriorityQueue(lambda item: item.key)
+    item = Item(1)
+    queue.push(item)
+    with pytest.raises(ValueError):
+        queue.push(item)
+
+
+def test_extend_skips_duplicates():
+    queue = PriorityQueue(lambda item: item.key)
+    first, second = Item(1), Item(2)
+    queue.push(first)
+    queue.extend([second, first, second])
+    assert len(queue) == 2
+    assert _drain(queue) == [1, 2]
+
+
+def test_entry_alias_orders_by_key():
+    assert PriorityQueueEntry(1, 'b') < PriorityQueueEntry(2, 'a')
+    assert PriorityQueueEntry(1, 'b') == PriorityQueueEntry(1, 'a')
+
+
+def test_update_keeps_insertion_order():
+    queue = PriorityQueue(lambda item: item.key)
+    first, second = Item(1), Item(1)
+    queue.extend([first, second])
+    queue.update(first)
+    assert queue.pop() is first
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+
+
+def test_prefetch_overlaps_sequential_key_functions():
+    async def first(x):
+        await asyncio.sleep(0.1)
+        return True
+
+    async def second(x):
+        await asyncio.sleep(0.1)
+        return True
+
+    engine = Engine(prefetch=True)
+
+    @engine.on(std.if_(first) & std.if_(second))
+    def handler(x):
+        return x
+
+    async def main():
+        begin = time.monotonic()
+        results = [res async for res in engine.forward(1)]
+        return results, time.monotonic() - begin
+
+    results, elapsed = asyncio.run(main())
+    assert results == [1]
+    assert elapsed < 0.18
+
+
+def test_unconsulted_prefetch_is_cancelled():
+    cancelled = []
+
+    async def slow(x):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(x)
+            raise
+        return True
+
+    engine = Engine(prefetch=True)
+
+    @engine.on(std.equals(1) & std.if_(slow))
+    def handler(x):
+        return x
+
+    async def main():
+        results = [res async for res in engine.forward(2)]
+        await asyncio.sleep(0)
+        return results
+
+    assert asyncio.run(main()) == []
+    assert cancelled == [2]
@@ -0,0 +1,55 @@
+import asyncio
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.routecache import RouteCache
+
+
+def _forward(engine, *events):
+    async def main():
+        return [[res async for res in engine.forward(x)] for x in events]
+
+    return asyncio.run(main())
+
+
+def _engine(maxsize=4096):
+    engine = Engine(route_cache=RouteCache(maxsize=maxsize))
+
+    @engine.on(std.equals(1))
+    def one(x):
+        return 'one'
+
+    @engine.on(std.equals(2))
+    def two(x):
+        return 'two'
+
+    return engine
+
+
+def test_repeated_values_hit_the_cache():
+    engine = _engine()
+    assert _forward(engine, 1, 2, 1, 2, 3) == [['one'], ['two'], ['one'], ['two'], []]
+    assert engine.route_cache.stats == {'size': 3, 'hits': 2, 'misses': 3}
+
+
+def test_subscribing_invalidates_the_cache():
+    engine = _engine()
+    assert _forward(engine, 1) == [['one']]
+    assert len(engine.route_cache) == 1
+
+    @engine.on(std.true)
+    def every(x):
+        return 'every'
+
+    assert sorted(_forward(engine, 1)[0]) == ['every', 'one']
+    assert engine.route_cache.stats['hits'] == 0
+
+
+def test_overflow_clears_the_cache():
+    engine = _engine(maxsize=2)
+    _forward(engine, 1, 2)
+    assert len(engine.route_cache) == 2
+    assert _forward(engine, 3) == [[]]
+    assert len(engine.route_cache) == 1
+    assert _forward(engine, 1) == [['one']]
+    assert engine.route_cache.stats['hits'] == 0
@@ -0,0 +1,55 @@
+import asyncio
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.models.execution import Scheduler
+
+
+def test_global_limit_across_events():
+    scheduler = Scheduler(max_workers=2)
+    engine = Engine(scheduler=scheduler)
+    running, peak = [0], [0]
+
+    @engine.on(std.true)
+    async def handler(x):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return x
+
+    async def forward(x):
+        return [res async for res in engine.forward(x)]
+
+    async def main():
+        return await asyncio.gather(*(forward(x) for x in range(6)))
+
+    assert asyncio.run(main()) == [[x] for x in range(6)]
+    assert peak[0] == 2
+    assert scheduler.running == 0
+
+
+def test_worker_held_by_handler_left_running():
+    scheduler = Scheduler(max_workers=2)
+    engine = Engine(scheduler=scheduler)
+
+    @engine.on(std.true)
+    async def fast(x):
+        await asyncio.sleep(0)
+        return 'fast'
+
+    @engine.on(std.true)
+    async def slow(x):
+        await asyncio.sleep(0.1)
+        return 'slow'
+
+    async def main():
+        results = engine.forward(1)
+        assert await results.__anext__() == 'fast'
+        await results.aclose()
+        await asyncio.sleep(0)
+        assert scheduler.running == 1
+        await asyncio.sleep(0.15)
+        assert scheduler.running == 0
+
+    asyncio.run(main())
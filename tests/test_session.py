@@ -0,0 +1,87 @@
+import asyncio
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.models import Executor, Priority, Task
+from ajenga.router.session import SessionRegistry
+
+
+def _dialog_engine(sessions):
+    engine = Engine(sessions=sessions)
+
+    @engine.on(std.if_(lambda x: x[1] == 'start'))
+    async def dialog(x):
+        args, _ = await Task.current().pause(session_key=x[0])
+        return 'got', args[0][1]
+
+    return engine
+
+
+def _forward(engine, *events, delay=0):
+    async def main():
+        results = []
+        for event in events:
+            results.append([res async for res in engine.forward(event)])
+            await asyncio.sleep(delay)
+        return results
+
+    return asyncio.run(main())
+
+
+def test_session_key_resumes_paused_task():
+    sessions = SessionRegistry(key=lambda x: x[0])
+    engine = _dialog_engine(sessions)
+    results = _forward(engine, ('alice', 'start'), ('bob', 'hi'), ('alice', 'hello'))
+    assert results == [[], [], [('got', 'hello')]]
+    assert sessions.stats == {'paused': 0, 'indexed': 0, 'expirations': 0, 'evictions': 0}
+
+
+def test_least_recently_paused_evicted_beyond_maxsize():
+    sessions = SessionRegistry(maxsize=2, key=lambda x: x[0])
+    engine = _dialog_engine(sessions)
+
+    async def main():
+        for event in ('a', 'start'), ('b', 'start'), ('c', 'start'):
+            assert [res async for res in engine.forward(event)] == []
+        assert [res async for res in engine.forward(('a', 'hello'))] == []
+        assert [res async for res in engine.forward(('c', 'hello'))] == [('got', 'hello')]
+        assert [task.session_key for task in sessions] == ['b']
+        assert sessions.footprint() > 0
+
+    asyncio.run(main())
+    assert sessions.evictions == 1
+
+
+def test_idle_tasks_expire():
+    sessions = SessionRegistry(idle_timeout=0.05, key=lambda x: x[0])
+    engine = _dialog_engine(sessions)
+    results = _forward(engine, ('a', 'start'), ('b', 'start'), ('a', 'hello'), delay=0.06)
+    assert results == [[], [], []]
+    assert sessions.expirations == 2
+    assert len(sessions) == 0
+
+
+def test_resumed_task_keeps_its_priority():
+    sessions = SessionRegistry(key=lambda x: x[0])
+    engine = Engine(sessions=sessions)
+
+    async def dialog(x):
+        task = Task.current()
+        await task.pause(session_key=x[0])
+        return task.priority
+
+    engine.on(std.if_(lambda x: x[1] == 'start'))(std.HandlerNode(dialog, priority=Priority.Post))
+    assert _forward(engine, ('a', 'start'), ('a', 'hello')) == [[], [Priority.Post]]
+
+
+def test_stop_leaves_woken_task_to_the_next_event():
+    sessions = SessionRegistry(key=lambda x: x[0])
+    engine = _dialog_engine(sessions)
+
+    def stopper(x):
+        Executor.current().stop()
+        return 'stopped'
+
+    engine.on(std.if_(lambda x: x[1] == 'stop'))(std.HandlerNode(stopper, priority=Priority.Pre))
+    results = _forward(engine, ('a', 'start'), ('a', 'stop'), ('a', 'hello'))
+    assert results == [[], ['stopped'], [('got', 'hello')]]
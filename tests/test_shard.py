@@ -0,0 +1,47 @@
+import asyncio
+import os
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.shard import ShardedEngine
+
+# Built again in each worker, which imports this module
+engine = Engine()
+
+
+@engine.on(std.true)
+def where(x, group):
+    return group, os.getpid()
+
+
+def _forward_all(sharded, events):
+    async def forward(*args):
+        try:
+            return [res async for res in sharded.forward(*args)]
+        except Exception as e:
+            return e
+
+    async def main():
+        try:
+            return await asyncio.gather(*(forward(*args) for args in events))
+        finally:
+            sharded.shutdown()
+
+    return asyncio.run(main())
+
+
+def test_same_shard_key_same_worker():
+    sharded = ShardedEngine(f'{__name__}:engine', shards=2, shard_key=lambda x, group: group)
+    results = _forward_all(sharded, [(x, x % 3) for x in range(12)])
+    workers = {}
+    for [(group, pid)] in results:
+        workers.setdefault(group, set()).add(pid)
+    assert sorted(workers) == [0, 1, 2]
+    assert all(len(pids) == 1 for pids in workers.values())
+
+
+def test_unpicklable_event_fails_its_own_request():
+    sharded = ShardedEngine(f'{__name__}:engine', shards=1)
+    results = _forward_all(sharded, [(1, 'a'), (lambda: None, 'b'), (2, 'c')])
+    assert [res[0][0] for res in (results[0], results[2])] == ['a', 'c']
+    assert isinstance(results[1], Exception)
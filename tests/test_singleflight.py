@@ -0,0 +1,66 @@
+import asyncio
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.keyfunc import KeyFunctionImpl
+from ajenga.router.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_evaluation():
+    flights = SingleFlight()
+    calls = []
+
+    async def evaluate():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def main():
+        return await asyncio.gather(*(flights.do('key', evaluate) for _ in range(5)))
+
+    assert asyncio.run(main()) == [42] * 5
+    assert len(calls) == 1
+    assert flights.stats == {'in_flight': 0, 'calls': 1, 'shared': 4}
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    flights = SingleFlight()
+
+    async def evaluate():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        first = asyncio.ensure_future(flights.do('key', evaluate))
+        second = asyncio.ensure_future(flights.do('key', evaluate))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == 42
+        assert first.cancelled()
+
+    asyncio.run(main())
+    assert len(flights) == 0
+
+
+def test_engine_coalesces_concurrent_events():
+    calls = []
+
+    async def key(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return True
+
+    engine = Engine(single_flight=SingleFlight())
+
+    @engine.on(std.if_(KeyFunctionImpl(key, cache_key=lambda x: x)))
+    def handler(x):
+        return x
+
+    async def forward(x):
+        return [res async for res in engine.forward(x)]
+
+    async def main():
+        return await asyncio.gather(*(forward(1) for _ in range(3)))
+
+    assert asyncio.run(main()) == [[1]] * 3
+    assert calls == [1]
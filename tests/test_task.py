@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+import pytest
+
+from ajenga.router.models import Task
+
+
+def test_extra_options_read_as_attributes():
+    async def fn():
+        pass
+
+    task = Task(fn, tag='a')
+    assert task.options == {'tag': 'a'}
+    assert task.tag == 'a'
+    with pytest.raises(AttributeError):
+        task.missing
+    assert not hasattr(task, '__dict__')
+
+
+def test_last_active_time_is_wall_clock():
+    async def fn():
+        await Task.current().pause()
+
+    async def main():
+        before = time.time()
+        task = Task(fn)
+        assert task.last_active_time >= before
+        await task.run()
+        assert task.paused and task.paused_at <= time.monotonic()
+        await task.resume()
+        assert task.last_active_time >= before
+
+    asyncio.run(main())
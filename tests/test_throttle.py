@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from ajenga.router import std
+from ajenga.router.engine import Engine
+from ajenga.router.limit import DROP, Throttle
+from ajenga.router.models import Task
+from ajenga.router.models.execution import PriorityExecutor, ThrottledError
+
+
+def _forward_all(engine, events):
+    async def forward(x):
+        return [res async for res in engine.forward(x)]
+
+    async def main():
+        return await asyncio.gather(*(forward(x) for x in events))
+
+    return asyncio.run(main())
+
+
+def test_max_concurrency_across_events():
+    engine = Engine()
+    running, peak = [0], [0]
+
+    async def handler(x):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return x
+
+    engine.on(std.true)(std.HandlerNode(handler, max_concurrency=2))
+    assert _forward_all(engine, range(5)) == [[x] for x in range(5)]
+    assert peak[0] == 2
+
+
+def test_drop_policy():
+    engine = Engine()
+
+    async def handler(x):
+        await asyncio.sleep(0.01)
+        return x
+
+    node = std.HandlerNode(handler, max_concurrency=1, throttle_policy=DROP)
+    engine.on(std.true)(node)
+    results = _forward_all(engine, range(3))
+    assert results[0] == [0]
+    assert all(isinstance(res[0], ThrottledError) for res in results[1:])
+    assert node.throttle.stats['dropped'] == 2
+
+
+def test_rate():
+    engine = Engine()
+    engine.on(std.true)(std.HandlerNode(lambda x: x, rate=20, burst=1))
+    begin = time.monotonic()
+    assert _forward_all(engine, range(3)) == [[0], [1], [2]]
+    assert time.monotonic() - begin >= 0.09
+
+
+def _pause_then_resume(throttle):
+    observed = []
+
+    async def pausing():
+        await Task.current().pause()
+        observed.append(throttle.running)
+        return 'resumed'
+
+    async def main():
+        task = Task(pausing, throttle=throttle)
+        executor = PriorityExecutor()
+        executor.add_task(task)
+        assert [res async for res in executor.run()] == []
+        assert task.paused and throttle.running == 0
+        assert throttle.acquire()
+        future = task.resume()
+        await asyncio.sleep(0.01)
+        done = future.done() and future.result()
+        throttle.release()
+        if not done:
+            done = await future
+        return task, done[2], observed
+
+    return asyncio.run(main())
+
+
+def test_direct_resume_waits_for_the_throttle():
+    throttle = Throttle(max_concurrency=1)
+    task, value, observed = _pause_then_resume(throttle)
+    assert value == 'resumed'
+    assert observed == [1]
+    assert throttle.running == 0 and throttle.delayed == 1
+
+
+def test_direct_resume_dropped_by_the_throttle():
+    throttle = Throttle(max_concurrency=1, policy=DROP)
+    task, value, observed = _pause_then_resume(throttle)
+    assert isinstance(value, ThrottledError)
+    assert observed == []
+    assert throttle.dropped == 1